@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: old per-word re-encoding chunker vs the single-pass chunker.
+
+    python benchmarks/bench_chunking.py --words 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from clipnotes.chunking import chunk_transcript
+from fixtures import VOCAB
+
+
+# Build a synthetic Whisper-like transcript of roughly n_words words
+def synthetic_transcript(n_words, seed=0):
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    remaining = n_words
+    while remaining > 0:
+        n = min(rng.randint(8, 16), remaining)
+        words = [rng.choice(VOCAB) for _ in range(n)]
+        text = " " + " ".join(words) + rng.choice([".", ",", "?", ""])
+        duration = n * 0.4
+        segments.append({"start": t, "end": t + duration, "text": text})
+        t += duration
+        remaining -= n
+    text = " ".join(seg["text"].strip() for seg in segments)
+    return text, segments
+
+
+# Chunking function as it shipped before the single-pass rewrite
+def legacy_chunk_transcript(text, tokenizer, max_tokens=3000):
+    words = text.split()
+    chunks = []
+    current_chunk = []
+
+    for word in words:
+        current_chunk.append(word)
+        token_count = len(tokenizer.encode(" ".join(current_chunk)))
+
+        if token_count >= max_tokens:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = []
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=50000)
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    parser.add_argument("--tokenizer", default="gpt2")
+    parser.add_argument(
+        "--skip-legacy", action="store_true", help="only time the new chunker"
+    )
+    args = parser.parse_args()
+
+    from transformers import GPT2TokenizerFast
+
+    tokenizer = GPT2TokenizerFast.from_pretrained(args.tokenizer)
+    text, segments = synthetic_transcript(args.words)
+    print(f"Synthetic transcript: {args.words} words, {len(segments)} segments")
+
+    new_chunks, new_time = timed(
+        chunk_transcript, text, tokenizer, args.max_tokens, segments=segments
+    )
+    print(f"single-pass (segments): {new_time:8.3f}s  {len(new_chunks)} chunks")
+
+    text_chunks, text_time = timed(chunk_transcript, text, tokenizer, args.max_tokens)
+    print(f"single-pass (sentences): {text_time:7.3f}s  {len(text_chunks)} chunks")
+
+    if not args.skip_legacy:
+        old_chunks, old_time = timed(
+            legacy_chunk_transcript, text, tokenizer, args.max_tokens
+        )
+        print(f"legacy per-word encode: {old_time:8.3f}s  {len(old_chunks)} chunks")
+        print(f"speedup: {old_time / max(new_time, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
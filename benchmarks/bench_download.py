@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark buffered (download, then compress) vs streaming (yt-dlp piped into
+ffmpeg) audio preparation with a fake yt-dlp serving local fixture media.
+
+    python benchmarks/bench_download.py --minutes 60 --rate 2000000
+"""
+
+import argparse
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from clipnotes.media import (
+    compress_audio,
+    download_audio_aggressive,
+    download_audio_streaming,
+    find_downloaded_file,
+)
+from fixtures import make_fixture_media
+
+
+def quiet(kind, message):
+    pass
+
+
+def run_buffered(url, workdir):
+    if not download_audio_aggressive(
+        url, os.path.join(workdir, "downloaded_bench.%(ext)s"), progress=quiet
+    ):
+        raise RuntimeError("buffered download failed")
+    downloaded = find_downloaded_file("downloaded_bench", workdir)
+    written = os.path.getsize(downloaded)
+    output = os.path.join(workdir, "compressed_bench.mp3")
+    if not compress_audio(downloaded, output, progress=quiet):
+        raise RuntimeError("compression failed")
+    return written + os.path.getsize(output)
+
+
+def run_streaming(url, workdir):
+    output = os.path.join(workdir, "compressed_bench.mp3")
+    if not download_audio_streaming(url, output, progress=quiet):
+        raise RuntimeError("streaming download failed")
+    return os.path.getsize(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="fake download speed in bytes/s"
+    )
+    args = parser.parse_args()
+
+    fixture_dir = tempfile.mkdtemp(prefix="clipnotes_fixture_")
+    source = make_fixture_media(
+        os.path.join(fixture_dir, f"source_{args.minutes}m.webm"), args.minutes * 60
+    )
+    os.environ["FAKE_YTDLP_SOURCE"] = source
+    os.environ["FAKE_YTDLP_RATE"] = str(args.rate)
+    os.environ["CLIPNOTES_YTDLP"] = shlex.join(
+        [sys.executable, os.path.join(BENCH_DIR, "fake_yt_dlp.py")]
+    )
+    print(f"Fixture: {args.minutes} min, {os.path.getsize(source) / 1e6:.1f} MB")
+
+    try:
+        for name, run in (("buffered", run_buffered), ("stream", run_streaming)):
+            workdir = tempfile.mkdtemp(prefix="clipnotes_dl_")
+            try:
+                start = time.perf_counter()
+                written = run("https://youtu.be/fixture0000", workdir)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{name:9s} {elapsed:7.2f}s  {written / 1e6:7.1f} MB written to disk"
+                )
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the chunk summary (map) stage against the local mock OpenAI server:
+sequential calls vs the bounded concurrent map.
+
+    python benchmarks/bench_map_stage.py --chunks 12 --latency 1.0 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI
+
+from clipnotes.llm import chat_complete, map_concurrent
+from mock_openai import start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--rate-limited",
+        type=int,
+        default=3,
+        help="number of requests the mock answers with 429 before succeeding",
+    )
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(latency=args.latency)
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+    prompts = [f"Summarize chunk {i} " + "word " * 200 for i in range(args.chunks)]
+
+    def summarize(prompt):
+        return chat_complete(client, prompt, base_delay=0.05)
+
+    try:
+        start = time.perf_counter()
+        sequential = [summarize(p) for p in prompts]
+        seq_time = time.perf_counter() - start
+        print(f"sequential:          {seq_time:6.2f}s")
+
+        server.fail_first = args.rate_limited
+        start = time.perf_counter()
+        concurrent = map_concurrent(summarize, prompts, max_workers=args.workers)
+        conc_time = time.perf_counter() - start
+        print(
+            f"concurrent (x{args.workers}):    {conc_time:6.2f}s  "
+            f"with {args.rate_limited} injected 429s"
+        )
+
+        assert concurrent == sequential, "concurrent map changed the output order"
+        print(f"speedup: {seq_time / conc_time:.1f}x  server stats: {server.stats}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Offline end-to-end benchmark of the full pipeline.
+
+Each case runs process_video() in a fresh interpreter with an empty cache
+dir, against the fake yt-dlp (serving a fixture of the given length) and the
+mock OpenAI server (Whisper returns a synthetic transcript of realistic
+length, chat calls take --latency seconds). Reports end-to-end latency,
+per-stage time from clipnotes.metrics (summed across threads), peak RSS and
+API call counts, and writes everything as JSON so commits can be compared.
+
+    python benchmarks/bench_pipeline.py --durations 10m 1h 4h --out before.json
+    python benchmarks/bench_pipeline.py --durations 10m 1h 4h --compare before.json
+
+With --captions the fake yt-dlp also serves auto-generated captions for the
+video, so the transcript comes from them instead of from Whisper. With
+--pauses SPEECH:SILENCE the fixture's tone is muted for SILENCE of every
+SPEECH + SILENCE seconds; compare runs with CLIPNOTES_TRIM_SILENCE=1 and
+without to see what cutting the pauses saves in upload and Whisper time.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "clipnotes-bench")
+STAGE_COUNTERS = ("prompt_tokens", "completion_tokens", "upload_bytes", "chunks")
+
+
+def parse_duration(text):
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_duration(seconds):
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip()
+
+    revision = git("rev-parse", "--short", "HEAD") or "unknown"
+    if git("status", "--porcelain", "--untracked-files=no"):
+        revision += "-dirty"
+    return revision
+
+
+def peak_rss_mb(who):
+    import resource
+
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Runs inside the fresh interpreter; prints one JSON line
+def run_child(url, style):
+    import resource
+
+    from clipnotes import metrics
+    from clipnotes.pipeline import process_video
+    from clipnotes.resources import get_openai_client, resource_timings
+
+    client = get_openai_client(os.getenv("OPENAI_API_KEY"))
+    workdir = tempfile.mkdtemp(prefix="clipnotes_bench_")
+    started = time.perf_counter()
+    result = process_video(
+        client, url, style, workdir=workdir, progress=lambda kind, message: None
+    )
+    elapsed = time.perf_counter() - started
+
+    stages = {}
+    for row in metrics.METRICS.snapshot()["stages"]:
+        stage = stages.setdefault(row["stage"], {"count": 0, "seconds": 0.0})
+        stage["count"] += row["count"]
+        stage["seconds"] += row["seconds"]
+        for name in STAGE_COUNTERS:
+            if name in row:
+                stage[name] = stage.get(name, 0) + row[name]
+
+    print(
+        json.dumps(
+            {
+                "e2e_seconds": elapsed,
+                "stages": stages,
+                "resource_load_seconds": resource_timings(),
+                "transcript_source": result["transcript_source"],
+                "transcript_tokens": result["estimated_tokens"],
+                "chunks": len(result["chunk_summaries"]),
+                "segments": len(result["segments"]),
+                "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+                "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+            }
+        )
+    )
+
+
+def run_case(server, env, url, style):
+    with server.lock:
+        server.stats.clear()
+    with tempfile.TemporaryDirectory(prefix="clipnotes_bench_cache_") as cache_dir:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", url, style],
+            cwd=REPO_DIR,
+            env={**env, "CLIPNOTES_CACHE_DIR": cache_dir},
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"{url} failed:\n{result.stderr[-2000:]}")
+    record = json.loads(result.stdout.strip().splitlines()[-1])
+    with server.lock:
+        record["api_calls"] = dict(server.stats)
+    return record
+
+
+def summarize(results):
+    by_duration = {}
+    for record in results:
+        by_duration.setdefault(record["duration_seconds"], []).append(record)
+    return {
+        duration: {
+            "e2e_seconds": statistics.median(r["e2e_seconds"] for r in records),
+            "peak_rss_mb": max(r["peak_rss_mb"] for r in records),
+        }
+        for duration, records in by_duration.items()
+    }
+
+
+def stage_seconds(record, name):
+    return record["stages"].get(name, {}).get("seconds", 0.0)
+
+
+def report(results, baseline=None):
+    print(
+        f"{'length':>7} {'e2e':>8} {'captions':>9} {'download':>9} {'trim':>7} "
+        f"{'whisper':>8} {'upload MB':>9} {'chat':>7} {'tokens':>7} {'chunks':>6} {'rss MB':>7} {'child MB':>8}  api calls"
+    )
+    for record in results:
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(record["api_calls"].items()))
+        print(
+            f"{format_duration(record['duration_seconds']):>7} "
+            f"{record['e2e_seconds']:7.2f}s "
+            f"{stage_seconds(record, 'captions'):8.2f}s "
+            f"{stage_seconds(record, 'download'):8.2f}s "
+            f"{stage_seconds(record, 'trim'):6.2f}s "
+            f"{stage_seconds(record, 'transcription'):7.2f}s "
+            f"{record['stages'].get('transcription', {}).get('upload_bytes', 0) / 1e6:9.1f} "
+            f"{stage_seconds(record, 'chat_completion'):6.2f}s "
+            f"{record['transcript_tokens']:7d} {record['chunks']:6d} "
+            f"{record['peak_rss_mb']:7.0f} {record['children_peak_rss_mb']:8.0f}  "
+            f"{calls}"
+        )
+    if baseline is None:
+        return
+
+    print(f"\ncompared with {baseline['revision']}:")
+    before = summarize(baseline["results"])
+    for duration, after in summarize(results).items():
+        if duration not in before:
+            continue
+        old = before[duration]
+        change = (after["e2e_seconds"] / old["e2e_seconds"] - 1) * 100
+        print(
+            f"{format_duration(duration):>7} e2e {old['e2e_seconds']:.2f}s -> "
+            f"{after['e2e_seconds']:.2f}s ({change:+.0f}%), peak RSS "
+            f"{old['peak_rss_mb']:.0f} -> {after['peak_rss_mb']:.0f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--durations", nargs="+", default=["10m", "1h", "4h"])
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--style", default="bullets")
+    parser.add_argument("--latency", type=float, default=0.5, help="mock API latency")
+    parser.add_argument(
+        "--whisper-rate",
+        type=float,
+        default=0.002,
+        help="mock processing seconds per second of audio",
+    )
+    parser.add_argument(
+        "--speech-wpm", type=int, default=150, help="words per minute of transcript"
+    )
+    parser.add_argument(
+        "--download-rate",
+        type=float,
+        default=0,
+        help="fake yt-dlp bytes/s (0 = unthrottled)",
+    )
+    parser.add_argument(
+        "--captions", action="store_true", help="serve captions for every video"
+    )
+    parser.add_argument(
+        "--pauses",
+        help="SPEECH:SILENCE seconds, e.g. 20:10 for a third of dead air",
+    )
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--out", help="write the results JSON here")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    from fixtures import make_fixture_captions, make_fixture_media
+    from mock_openai import start_mock_server
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    os.makedirs(args.fixture_dir, exist_ok=True)
+    server, base_url = start_mock_server(
+        latency=args.latency,
+        whisper_rate=args.whisper_rate,
+        speech_wpm=args.speech_wpm,
+    )
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": "mock",
+        "CLIPNOTES_TELEMETRY_URL": "",
+        "CLIPNOTES_YTDLP": shlex.join(
+            [sys.executable, os.path.join(BENCH_DIR, "fake_yt_dlp.py")]
+        ),
+        "FAKE_YTDLP_RATE": str(args.download_rate),
+    }
+
+    pauses = None
+    suffix = ""
+    if args.pauses:
+        pauses = tuple(float(part) for part in args.pauses.split(":"))
+        suffix = "_pauses{:g}-{:g}".format(*pauses)
+
+    results = []
+    try:
+        for duration in map(parse_duration, args.durations):
+            # 32 kbps keeps a 4 hour fixture under 60 MB
+            source = make_fixture_media(
+                os.path.join(args.fixture_dir, f"source_{duration}s{suffix}.webm"),
+                duration,
+                bitrate="32k",
+                pauses=pauses,
+            )
+            env["FAKE_YTDLP_SOURCE"] = source
+            env.pop("FAKE_YTDLP_SUBS", None)
+            if args.captions:
+                env["FAKE_YTDLP_SUBS"] = make_fixture_captions(
+                    os.path.join(args.fixture_dir, f"captions_{duration}s.vtt"),
+                    duration,
+                    words_per_minute=args.speech_wpm,
+                )
+            for run in range(args.runs):
+                url = f"https://youtu.be/b{duration:06d}r{run:03d}"
+                record = run_case(server, env, url, args.style)
+                record.update(duration_seconds=duration, run=run)
+                results.append(record)
+    finally:
+        server.shutdown()
+
+    output = {
+        "revision": git_revision(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("out", "compare", "child")
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(output, f, indent=2)
+    report(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
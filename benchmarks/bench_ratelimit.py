@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Several sessions summarizing at once against a mock OpenAI server with a
+requests/tokens-per-minute quota: no admission control (every session backs
+off on its own), the shared RateLimiter set to the quota but admitting in
+arrival order, and the RateLimiter with its fair queuing between sessions.
+
+Each "long" session sends --calls chat calls, --workers at a time; one
+"short" session joins --short-delay seconds later with two calls, as
+someone summarizing a short video while the others run.
+
+    python benchmarks/bench_ratelimit.py --sessions 3 --calls 12 --tpm 12000
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI
+
+from clipnotes import metrics
+from clipnotes.llm import chat_complete, map_concurrent
+from clipnotes.ratelimit import RateLimiter
+from fixtures import synthetic_sentence
+from mock_openai import start_mock_server
+
+
+# A limiter that never waits and never holds: every caller on its own
+class NoAdmission(RateLimiter):
+    def acquire(self, tokens=0, tenant=None):
+        pass
+
+    def hold(self, seconds):
+        pass
+
+
+# The limiter with every call in one queue, first come first served
+class FirstCome(RateLimiter):
+    def acquire(self, tokens=0, tenant=None):
+        super().acquire(tokens, tenant="everyone")
+
+
+def run_session(client, limiter, name, prompts, workers, results):
+    started = time.perf_counter()
+
+    def call(prompt):
+        try:
+            chat_complete(client, prompt, max_tokens=100, limiter=limiter)
+            return True
+        except Exception:
+            return False
+
+    with metrics.trace(name):
+        ok = map_concurrent(call, prompts, max_workers=workers)
+    results[name] = {
+        "seconds": time.perf_counter() - started,
+        "failed": ok.count(False),
+    }
+
+
+def run(args, limiter, prompts):
+    server, base_url = start_mock_server(
+        latency=args.latency, rpm=args.rpm, tpm=args.tpm
+    )
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+    metrics.METRICS.reset()
+    results = {}
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(client, limiter, f"long-{i}", prompts, args.workers, results),
+        )
+        for i in range(args.sessions)
+    ]
+    short = threading.Thread(
+        target=run_session,
+        args=(client, limiter, "short", prompts[:2], args.workers, results),
+    )
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(args.short_delay)
+        short.start()
+        for thread in threads + [short]:
+            thread.join()
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - started
+
+    waits = [
+        row
+        for row in metrics.METRICS.snapshot()["stages"]
+        if row["stage"] == "rate_limit_wait"
+    ]
+    longest = max((r["seconds"] for n, r in results.items() if n != "short"))
+    print(
+        f"{limiter.name:>8}: {elapsed:6.1f}s total, "
+        f"{server.stats.get('chat', 0)} calls, "
+        f"{server.stats.get('over_quota', 0)} got 429, "
+        f"{sum(r['failed'] for r in results.values())} failed; "
+        f"short session {results['short']['seconds']:.1f}s, "
+        f"slowest long session {longest:.1f}s"
+    )
+    for row in waits:
+        print(
+            f"          queued {row['throttled']} of {row['count']} calls, "
+            f"waited {row['seconds']:.1f}s in total, at most {row['max_seconds']:.1f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--calls", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--prompt-words", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rpm", type=int, default=60)
+    parser.add_argument("--tpm", type=int, default=12000)
+    parser.add_argument("--short-delay", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    prompts = [
+        "".join(synthetic_sentence(rng, 10) for _ in range(args.prompt_words // 10))
+        for _ in range(args.calls)
+    ]
+    run(args, NoAdmission("none"), prompts)
+    run(args, FirstCome("fifo", args.rpm, args.tpm), prompts)
+    run(args, RateLimiter("fair", args.rpm, args.tpm), prompts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Reduce stage for many chunk notes against the mock OpenAI server: one
+condensing call over all of them vs the token-budgeted merge tree.
+
+    python benchmarks/bench_reduce.py --chunks 40 --summary-words 600 --fan-in 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI
+
+from clipnotes.llm import chat_complete
+from clipnotes.resources import get_tokenizer
+from clipnotes.summarize import (
+    MODEL_CONTEXT_TOKENS,
+    NOTES_PROMPT_TEMPLATES,
+    SUMMARY_MAX_TOKENS,
+    merge_notes,
+)
+from fixtures import synthetic_sentence
+from mock_openai import start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--summary-words", type=int, default=600)
+    parser.add_argument("--fan-in", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--style", default="bullets")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    summaries = [
+        "".join(synthetic_sentence(rng, 12) for _ in range(args.summary_words // 12))
+        for _ in range(args.chunks)
+    ]
+    tokenizer = get_tokenizer()
+    server, base_url = start_mock_server(latency=args.latency)
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+
+    try:
+        flat_prompt = NOTES_PROMPT_TEMPLATES[args.style].replace(
+            "{combined}", "\n\n".join(summaries)
+        )
+        flat_tokens = len(tokenizer.encode(flat_prompt))
+        start = time.perf_counter()
+        chat_complete(client, flat_prompt)
+        flat_time = time.perf_counter() - start
+        fits = flat_tokens + SUMMARY_MAX_TOKENS <= MODEL_CONTEXT_TOKENS
+        print(
+            f"single call: {flat_time:6.2f}s, prompt {flat_tokens} tokens "
+            f"({'fits' if fits else 'OVER'} the {MODEL_CONTEXT_TOKENS}-token context)"
+        )
+
+        server.stats.clear()
+        start = time.perf_counter()
+        merged, levels = merge_notes(
+            client,
+            tokenizer,
+            summaries,
+            progress=lambda kind, message: None,
+            max_workers=args.workers,
+            fan_in=args.fan_in,
+        )
+        chat_complete(
+            client,
+            NOTES_PROMPT_TEMPLATES[args.style].replace(
+                "{combined}", "\n\n".join(merged)
+            ),
+        )
+        tree_time = time.perf_counter() - start
+        print(
+            f"reduce tree: {tree_time:6.2f}s, depth {len(levels)}, "
+            f"{server.stats.get('chat', 0)} calls"
+        )
+        for depth, level in enumerate(levels, start=1):
+            print(
+                f"  level {depth}: {level['summaries']} summaries -> "
+                f"{level['groups']} groups, {level['input_tokens']} input tokens"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
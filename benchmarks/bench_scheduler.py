@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Exercise the adaptive download scheduler with a fake yt-dlp whose strategies
+fail on a script: compare the fixed strategy order, the learned order, and
+racing the top strategies.
+
+    python benchmarks/bench_scheduler.py --runs 5 --race 2
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from clipnotes.media import DOWNLOAD_STRATEGIES, download_audio_streaming
+from clipnotes.strategies import StrategyScheduler
+from fixtures import make_fixture_media
+
+# Desktop and mobile user agents get blocked, the basic strategy is flaky and
+# slow, format selection works but slowly, IPv4 works quickly.
+RULES = [
+    {"match": "Macintosh", "delay": 4, "exit": 1, "stderr": "HTTP Error 403"},
+    {"match": "iPhone", "delay": 3, "exit": 1, "stderr": "Sign in to confirm"},
+    {"match": "--retries", "delay": 5, "fail_rate": 0.7},
+    {"match": "bestaudio[ext=webm]/bestaudio[ext=m4a]", "delay": 3},
+    {"match": "--force-ipv4", "delay": 0.5},
+]
+
+
+def quiet(kind, message):
+    pass
+
+
+def timed_download(workdir, scheduler=None, race=1):
+    output = os.path.join(workdir, "compressed_bench.mp3")
+    start = time.perf_counter()
+    ok = download_audio_streaming(
+        "https://youtu.be/fixture0000",
+        output,
+        progress=quiet,
+        scheduler=scheduler,
+        race=race,
+    )
+    elapsed = time.perf_counter() - start
+    if os.path.exists(output):
+        os.remove(output)
+    return ok, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--race", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="clipnotes_sched_")
+    os.environ["FAKE_YTDLP_SOURCE"] = make_fixture_media(
+        os.path.join(workdir, "source.webm"), 30
+    )
+    os.environ["FAKE_YTDLP_RULES"] = json.dumps(RULES)
+    os.environ["CLIPNOTES_YTDLP"] = shlex.join(
+        [sys.executable, os.path.join(BENCH_DIR, "fake_yt_dlp.py")]
+    )
+    stats_path = os.path.join(workdir, "download_stats.json")
+
+    try:
+        ok, elapsed = timed_download(workdir)
+        print(f"fixed order:            {elapsed:6.2f}s ok={ok}")
+
+        for run in range(args.runs):
+            scheduler = StrategyScheduler(DOWNLOAD_STRATEGIES, stats_path=stats_path)
+            order = scheduler.order()
+            ok, elapsed = timed_download(workdir, scheduler)
+            print(
+                f"adaptive run {run + 1}:         {elapsed:6.2f}s ok={ok} order={order}"
+            )
+
+        os.remove(stats_path)
+        for run in range(2):
+            scheduler = StrategyScheduler(DOWNLOAD_STRATEGIES, stats_path=stats_path)
+            ok, elapsed = timed_download(workdir, scheduler, race=args.race)
+            print(f"race top {args.race}, run {run + 1}:     {elapsed:6.2f}s ok={ok}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Transcript search on a long synthetic transcript: inverted index vs
+scanning every segment's text.
+
+    python benchmarks/bench_search.py --hours 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_chunking import synthetic_transcript
+from clipnotes.search import SearchIndex
+
+QUERIES = ["strategy", "grow*", '"market growth"', 'company "data people" re*']
+
+
+# What finding a phrase looked like without an index
+def scan(segments, phrase):
+    phrase = phrase.lower()
+    return [i for i, seg in enumerate(segments) if phrase in seg["text"].lower()]
+
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--words-per-minute", type=int, default=150)
+    args = parser.parse_args()
+
+    _, segments = synthetic_transcript(int(args.hours * 60 * args.words_per_minute))
+    index, build = timed(SearchIndex.build, segments, repeat=1)
+    stored = json.dumps(index.to_dict(), separators=(",", ":"))
+    _, load = timed(lambda: SearchIndex.from_dict(json.loads(stored)))
+    print(
+        f"{len(segments)} segments: build {build * 1000:.0f} ms, "
+        f"stored {len(stored) / 1e6:.1f} MB, load {load * 1000:.0f} ms"
+    )
+
+    for query in QUERIES:
+        hits, elapsed = timed(index.search, query)
+        print(f"{query:>30}: {elapsed * 1000:7.2f} ms, {len(hits)} segments")
+
+    hits, elapsed = timed(scan, segments, "market growth")
+    print(
+        f"{'scan for market growth':>30}: {elapsed * 1000:7.2f} ms, {len(hits)} segments"
+    )
+
+
+if __name__ == "__main__":
+    main()
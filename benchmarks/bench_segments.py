@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Memory held per transcript for its segments, and the cost of storing them,
+for a long synthetic transcript: OpenAI segment objects (everything Whisper
+returns), the {start, end, text} dicts kept before, and a SegmentTable.
+Sizes include the transcript text, which sessions keep next to the
+segments and which a table shares instead of copying.
+
+    python benchmarks/bench_segments.py --hours 4
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from openai.types.audio import TranscriptionSegment
+
+from bench_chunking import synthetic_transcript
+from clipnotes.segments import SegmentTable
+
+
+# Bytes allocated by build() that are still alive afterwards
+def retained(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, size
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--words-per-minute", type=int, default=150)
+    args = parser.parse_args()
+
+    _, plain = synthetic_transcript(int(args.hours * 60 * args.words_per_minute))
+    raw = json.dumps(plain)
+
+    def openai_objects():
+        segments = [
+            TranscriptionSegment(
+                id=i,
+                seek=0,
+                start=seg["start"],
+                end=seg["end"],
+                text=seg["text"],
+                tokens=list(range(50000, 50000 + len(seg["text"].split()) + 2)),
+                temperature=0.0,
+                avg_logprob=-0.2,
+                compression_ratio=1.2,
+                no_speech_prob=0.01,
+            )
+            for i, seg in enumerate(json.loads(raw))
+        ]
+        return segments, " ".join(seg.text for seg in segments)
+
+    def dicts():
+        segments = json.loads(raw)
+        return segments, " ".join(seg["text"] for seg in segments)
+
+    def table():
+        segments = SegmentTable.from_segments(json.loads(raw))
+        return segments, segments.text
+
+    print(f"{len(plain)} segments ({args.hours:g} h)")
+    sizes = {}
+    for name, build in (
+        ("OpenAI segment objects", openai_objects),
+        ("dicts", dicts),
+        ("SegmentTable", table),
+    ):
+        _, sizes[name] = retained(build)
+        print(
+            f"{name:>24}: {sizes[name] / 1e6:6.2f} MB, "
+            f"{sizes[name] / len(plain):5.0f} bytes per segment"
+        )
+    print(
+        f"SegmentTable vs dicts: {sizes['dicts'] / sizes['SegmentTable']:.1f}x less "
+        "memory per session"
+    )
+
+    segments = SegmentTable.from_segments(plain)
+    stored = json.dumps(segments.to_dict(with_text=False), separators=(",", ":"))
+    legacy = json.dumps(plain, separators=(",", ":"))
+    _, legacy_load = timed(lambda: json.loads(legacy))
+    _, table_load = timed(
+        lambda: SegmentTable.from_dict(json.loads(stored), text=segments.text)
+    )
+    print(
+        f"store row: {len(legacy) / 1e6:.2f} MB as dicts, "
+        f"{len(stored) / 1e6:.2f} MB as columns (text kept once, in its own column)"
+    )
+    print(
+        f"load: {legacy_load * 1000:.1f} ms as dicts, "
+        f"{table_load * 1000:.1f} ms as columns"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Startup timing harness for the Streamlit app.
+
+Runs the script headlessly with streamlit's AppTest in a fresh interpreter
+and reports the cold first run (imports + module-level setup) and the median
+rerun (what every widget interaction costs).
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --compare-ref HEAD~1   # before/after
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_SCRIPT = "summarizer_app_github.py"
+
+MEASURE = """
+import json, statistics, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.run()
+first_run = time.perf_counter()
+reruns = []
+for _ in range(int(sys.argv[2])):
+    t = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - t)
+print(json.dumps({
+    "streamlit_import_s": imported - started,
+    "cold_first_run_s": first_run - imported,
+    "rerun_median_s": statistics.median(reruns) if reruns else None,
+    "errors": [e.value for e in at.exception],
+}))
+"""
+
+
+def measure(script, reruns):
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE, script, str(reruns)],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report(label, timings):
+    print(
+        f"{label:>12}: import streamlit {timings['streamlit_import_s']:.2f}s | "
+        f"cold first run {timings['cold_first_run_s']:.2f}s | "
+        f"rerun median {timings['rerun_median_s'] * 1000:.0f} ms"
+    )
+    for error in timings["errors"]:
+        print(f"{'':>14}app raised: {error[:200]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument(
+        "--compare-ref", help="git ref whose version of the app to time as 'before'"
+    )
+    parser.add_argument("--json", action="store_true", help="print raw JSON only")
+    args = parser.parse_args()
+
+    results = {}
+    if args.compare_ref:
+        # Keep the old script next to the current one so its imports resolve
+        old_script = os.path.join(REPO_DIR, f".startup_{os.getpid()}.py")
+        source = subprocess.run(
+            ["git", "show", f"{args.compare_ref}:{APP_SCRIPT}"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            check=True,
+        ).stdout
+        with open(old_script, "wb") as f:
+            f.write(source)
+        try:
+            results["before"] = measure(old_script, args.reruns)
+        finally:
+            os.remove(old_script)
+    results["current"] = measure(APP_SCRIPT, args.reruns)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for label, timings in results.items():
+        report(label, timings)
+
+
+if __name__ == "__main__":
+    main()
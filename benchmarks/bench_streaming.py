@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Time to first useful output against the mock OpenAI server, which takes
+--latency seconds to a reply's first word and --token-interval per further
+word. Without streaming nothing can be shown before the whole summarize step
+is done; with on_partial the first summary words, and the notes of the first
+finished chunk, show up long before that.
+
+    python benchmarks/bench_streaming.py --reply-words 400 --token-interval 0.02
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from openai import OpenAI
+
+from clipnotes import metrics
+from clipnotes.resources import get_tokenizer
+from clipnotes.summarize import summarize_styles
+from fixtures import synthetic_sentence
+from mock_openai import start_mock_server
+
+
+def quiet(kind, message):
+    pass
+
+
+def synthetic_segments(rng, minutes, words_per_minute):
+    return [
+        {
+            "start": i * 6.0,
+            "end": i * 6.0 + 6.0,
+            "text": synthetic_sentence(rng, words_per_minute // 10),
+        }
+        for i in range(int(minutes * 10))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--reply-words", type=int, default=400)
+    parser.add_argument("--words-per-minute", type=int, default=150)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    reply = " ".join(synthetic_sentence(rng, 10) for _ in range(args.reply_words // 10))
+    server, base_url = start_mock_server(
+        latency=args.latency, token_interval=args.token_interval, chat_reply=reply
+    )
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+    tokenizer = get_tokenizer()
+
+    try:
+        for name, minutes in (("10 min video", 10), ("2 h video", 120)):
+            segments = synthetic_segments(rng, minutes, args.words_per_minute)
+            text = " ".join(seg["text"].strip() for seg in segments)
+            for streamed in (False, True):
+                first = {}
+                start = time.perf_counter()
+
+                def on_partial(kind, key, partial_text):
+                    first.setdefault(kind, time.perf_counter() - start)
+
+                summarize_styles(
+                    client,
+                    tokenizer,
+                    text,
+                    segments,
+                    ["bullets"],
+                    progress=quiet,
+                    on_partial=on_partial if streamed else None,
+                )
+                total = time.perf_counter() - start
+                shown = min(first.values()) if first else total
+                print(
+                    f"{name}, {'streamed' if streamed else 'blocking'}: "
+                    f"first output {shown:6.2f}s, done {total:6.2f}s"
+                    + "".join(
+                        f", first {kind} {seconds:.2f}s"
+                        for kind, seconds in sorted(first.items())
+                    )
+                )
+
+        ttft = [
+            row
+            for row in metrics.METRICS.snapshot()["stages"]
+            if row["stage"] == "chat_first_token"
+        ]
+        for row in ttft:
+            print(
+                f"time to first token: {row['seconds'] / row['count']:.2f}s mean "
+                f"over {row['count']} streamed calls"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
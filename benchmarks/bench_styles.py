@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of asking for several summary styles of one long transcript against the
+mock OpenAI server: re-running the map stage per style (what switching the
+style used to do) vs reusing the style-neutral chunk notes, and all five
+styles from a single pass.
+
+    python benchmarks/bench_styles.py --hours 2 --latency 1
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from openai import OpenAI
+
+from clipnotes.resources import get_tokenizer
+from clipnotes.summarize import SUMMARY_PROMPT_TEMPLATES, summarize_styles
+from fixtures import synthetic_sentence
+from mock_openai import start_mock_server
+
+
+def quiet(kind, message):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=2)
+    parser.add_argument("--words-per-minute", type=int, default=150)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    segments = []
+    for i in range(int(args.hours * 600)):
+        text = synthetic_sentence(rng, args.words_per_minute // 10)
+        segments.append({"start": i * 6.0, "end": i * 6.0 + 6.0, "text": text})
+    text = " ".join(seg["text"].strip() for seg in segments)
+    styles = list(SUMMARY_PROMPT_TEMPLATES)
+    tokenizer = get_tokenizer()
+    server, base_url = start_mock_server(latency=args.latency)
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+
+    def run(label, fn):
+        server.stats.clear()
+        start = time.perf_counter()
+        fn()
+        print(
+            f"{label:<34} {time.perf_counter() - start:6.2f}s "
+            f"{server.stats.get('chat', 0):4d} chat calls"
+        )
+
+    def summarize(style_list, notes=None):
+        return summarize_styles(
+            client,
+            tokenizer,
+            text,
+            segments,
+            style_list,
+            progress=quiet,
+            max_workers=args.workers,
+            notes=notes,
+        )
+
+    try:
+        run(
+            f"{len(styles)} styles, map pass each:",
+            lambda: [summarize([style]) for style in styles],
+        )
+        notes = summarize([styles[0]])["notes"]
+        run(
+            f"{len(styles) - 1} more styles from stored notes:",
+            lambda: [summarize([style], notes) for style in styles[1:]],
+        )
+        run(f"all {len(styles)} styles in one pass:", lambda: summarize(styles))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Measure what usage logging costs the request that triggers it, against a
+slow local webhook stub, and check that events survive a sink outage.
+
+    python benchmarks/bench_telemetry.py --events 20 --latency 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import requests
+
+from clipnotes.telemetry import UsageReporter
+from telemetry_sink import start_telemetry_sink
+
+
+def make_event(i):
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "video_url": f"https://youtu.be/bench{i:06d}",
+        "summary_type": "basic",
+        "status": "success",
+        "method": "whisper",
+    }
+
+
+# The old log_usage: one blocking post per event
+def inline_post(url, event):
+    try:
+        requests.post(url, json=event)
+    except Exception as e:
+        print(f"Usage logging failed: {e}")
+
+
+def wait_for(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    sink, url = start_telemetry_sink(latency=args.latency)
+    workdir = tempfile.mkdtemp(prefix="clipnotes_telemetry_")
+
+    started = time.perf_counter()
+    for i in range(args.events):
+        inline_post(url, make_event(i))
+    inline = time.perf_counter() - started
+    print(
+        f"inline post:   {inline / args.events * 1000:8.1f} ms per event on the "
+        f"request path, {sink.posts} posts"
+    )
+
+    sink.events.clear()
+    sink.posts = 0
+    reporter = UsageReporter(
+        url,
+        timeout=args.latency + 2,
+        flush_interval=1.0,
+        spool_path=os.path.join(workdir, "spool.jsonl"),
+    )
+    started = time.perf_counter()
+    for i in range(args.events):
+        reporter.log(make_event(i))
+    queued = time.perf_counter() - started
+    wait_for(lambda: len(sink.events) >= args.events)
+    print(
+        f"queued:        {queued / args.events * 1000:8.3f} ms per event on the "
+        f"request path, {sink.posts} posts, {len(sink.events)} events delivered"
+    )
+
+    # Sink outage: events are spooled to disk, then delivered on recovery
+    sink.events.clear()
+    sink.down = True
+    for i in range(args.events):
+        reporter.log(make_event(i))
+    wait_for(lambda: reporter.stats()["spooled"] >= args.events)
+    spooled = reporter.stats()["spooled"]
+    sink.down = False
+    wait_for(lambda: len(sink.events) >= args.events)
+    print(
+        f"outage:        {spooled} events spooled, {len(sink.events)} delivered "
+        f"after recovery"
+    )
+    print(f"reporter stats: {reporter.stats()}")
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark split-and-stitch Whisper transcription against the mock server:
+one upload of the whole file vs pieces transcribed by 1..N workers.
+
+    python benchmarks/bench_transcription.py --minutes 120 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI
+
+from clipnotes.transcribe import transcribe_file, transcribe_parallel
+from fixtures import make_fixture_audio
+from mock_openai import start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=120)
+    parser.add_argument("--piece-seconds", type=int, default=600)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--whisper-rate",
+        type=float,
+        default=0.002,
+        help="mock processing seconds per second of audio",
+    )
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="clipnotes_bench_")
+    audio = make_fixture_audio(
+        os.path.join(workdir, f"tone_{args.minutes}m.mp3"), args.minutes * 60
+    )
+    server, base_url = start_mock_server(latency=0.2, whisper_rate=args.whisper_rate)
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+
+    try:
+        start = time.perf_counter()
+        single = transcribe_file(client, audio)
+        print(
+            f"single upload:  {time.perf_counter() - start:6.2f}s  "
+            f"{len(single)} segments, last ends at {single[-1]['end']:.0f}s"
+        )
+        for workers in args.workers:
+            start = time.perf_counter()
+            segments = transcribe_parallel(
+                client, audio, piece_seconds=args.piece_seconds, max_workers=workers
+            )
+            elapsed = time.perf_counter() - start
+            monotonic = all(
+                a["start"] <= b["start"] for a, b in zip(segments, segments[1:])
+            )
+            print(
+                f"{workers:2d} worker(s):   {elapsed:6.2f}s  {len(segments)} segments, "
+                f"last ends at {segments[-1]['end']:.0f}s, ordered={monotonic}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
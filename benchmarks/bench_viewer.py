@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of one transcript viewer rerun: the old full HTML rebuild vs one page
+of the precomputed sentence index.
+
+    python benchmarks/bench_viewer.py --hours 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_chunking import synthetic_transcript
+from clipnotes.segments import (
+    SegmentTable,
+    format_timestamp,
+    sentence_at,
+    sentence_index,
+    sentence_times,
+    sentence_window,
+)
+
+PAGE_SENTENCES = 40
+
+
+# Viewer body as it shipped before the sentence index
+def legacy_transcript_html(segments):
+    transcript_lines = ""
+    current_text = ""
+    current_start = None
+
+    for i, seg in enumerate(segments):
+        if current_start is None:
+            current_start = int(seg["start"])
+        current_text += seg["text"].strip() + " "
+        if seg["text"].strip().endswith((".", "?", "!")) or i == len(segments) - 1:
+            minutes = current_start // 60
+            seconds = current_start % 60
+            timestamp = f"[{minutes}:{seconds:02d}]"
+            transcript_lines += f"<p><span style='color:#00bcd4'><strong>{timestamp}</strong></span> {current_text.strip()}</p>"
+            current_text = ""
+            current_start = None
+    return transcript_lines
+
+
+def page_html(segments, starts, times, seconds):
+    first = sentence_at(times, seconds) // PAGE_SENTENCES * PAGE_SENTENCES
+    return "".join(
+        f"<p><span style='color:#00bcd4'><strong>[{format_timestamp(start)}]"
+        f"</strong></span> {text}</p>"
+        for start, text in sentence_window(
+            segments, starts, first, first + PAGE_SENTENCES
+        )
+    )
+
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--words-per-minute", type=int, default=150)
+    args = parser.parse_args()
+
+    _, segments = synthetic_transcript(int(args.hours * 60 * args.words_per_minute))
+    html, legacy = timed(legacy_transcript_html, segments)
+    print(
+        f"full rebuild:   {legacy * 1000:8.2f} ms per rerun, "
+        f"{len(html) / 1e6:.1f} MB of HTML"
+    )
+
+    # The app keeps a transcript's segments as a SegmentTable
+    segments = SegmentTable.from_segments(segments)
+    starts, build = timed(sentence_index, segments)
+    times = sentence_times(segments, starts)
+    print(f"sentence index: {build * 1000:8.2f} ms once, {len(starts)} sentences")
+
+    middle = segments[-1]["end"] / 2
+    page, paged = timed(page_html, segments, starts, times, middle)
+    print(
+        f"one page:       {paged * 1000:8.2f} ms per rerun, "
+        f"{len(page) / 1e3:.1f} kB of HTML ({legacy / paged:.0f}x less time)"
+    )
+
+
+if __name__ == "__main__":
+    main()
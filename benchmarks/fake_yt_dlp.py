@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Fake yt-dlp for offline benchmarks. Point the app at it with
+
+    CLIPNOTES_YTDLP="python benchmarks/fake_yt_dlp.py"
+    FAKE_YTDLP_SOURCE=/path/to/fixture.webm
+
+It "downloads" FAKE_YTDLP_SOURCE, throttled to FAKE_YTDLP_RATE bytes/s
+(0 = unthrottled), either to stdout (--output -) or to the output template.
+With -x --audio-format mp3 it converts to mp3 with ffmpeg, like yt-dlp does.
+With --skip-download it only "writes subtitles": FAKE_YTDLP_SUBS (a .vtt or
+.srv3 file) is copied to the output template as the "en" track, and without
+it the video has no captions and nothing is written.
+
+FAKE_YTDLP_RULES scripts failures: a JSON list of rules such as
+
+    [{"match": "iPhone", "delay": 3, "exit": 1, "stderr": "HTTP Error 403"},
+     {"match": "--force-ipv4", "fail_rate": 0.5}]
+
+The first rule whose "match" occurs in the command line applies: it sleeps
+"delay" seconds, then fails with "exit" (always, or with probability
+"fail_rate"); otherwise the download proceeds.
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+CHUNK = 64 * 1024
+
+
+def option(args, *names):
+    for name in names:
+        if name in args:
+            return args[args.index(name) + 1]
+    return None
+
+
+def copy_throttled(src, dst, rate):
+    started = time.perf_counter()
+    sent = 0
+    while True:
+        block = src.read(CHUNK)
+        if not block:
+            break
+        dst.write(block)
+        sent += len(block)
+        if rate:
+            ahead = sent / rate - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+    dst.flush()
+
+
+# Apply the first scripted rule matching this command line
+def apply_rules(args):
+    command_line = " ".join(args)
+    for rule in json.loads(os.getenv("FAKE_YTDLP_RULES", "[]")):
+        if rule.get("match", "") not in command_line:
+            continue
+        time.sleep(rule.get("delay", 0))
+        if "exit" in rule or "fail_rate" in rule:
+            if random.random() < rule.get("fail_rate", 1.0):
+                sys.stderr.write(rule.get("stderr", "ERROR: scripted failure") + "\n")
+                return rule.get("exit", 1)
+        return None
+    return None
+
+
+def main(args):
+    failed = apply_rules(args)
+    if failed is not None:
+        return failed
+
+    output = option(args, "--output", "-o") or "%(title)s.%(ext)s"
+    if "--skip-download" in args:
+        subs = os.getenv("FAKE_YTDLP_SUBS")
+        if subs:
+            ext = os.path.splitext(subs)[1]
+            target = output.replace(".%(ext)s", f".en{ext}")
+            target = target.replace("%(title)s", "fixture")
+            shutil.copyfile(subs, target)
+        return 0
+
+    source = os.environ["FAKE_YTDLP_SOURCE"]
+    rate = float(os.getenv("FAKE_YTDLP_RATE", "0"))
+    ext = os.path.splitext(source)[1].lstrip(".")
+
+    if output == "-":
+        with open(source, "rb") as src:
+            copy_throttled(src, sys.stdout.buffer, rate)
+        return 0
+
+    target = output.replace("%(ext)s", ext).replace("%(title)s", "fixture")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        copy_throttled(src, dst, rate)
+
+    if "-x" in args and option(args, "--audio-format") == "mp3" and ext != "mp3":
+        converted = os.path.splitext(target)[0] + ".mp3"
+        subprocess.run(
+            [os.getenv("CLIPNOTES_FFMPEG", "ffmpeg"), "-y", "-i", target, converted],
+            check=True,
+            capture_output=True,
+        )
+        os.remove(target)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Fixture media and transcripts for the offline benchmarks.
+"""
+
+import os
+import random
+import subprocess
+
+VOCAB = (
+    "the market growth strategy model product customer team data people "
+    "really think going right know interesting question because about "
+    "important future building company research learning example actually"
+).split()
+
+
+def ffmpeg_binary():
+    return os.getenv("CLIPNOTES_FFMPEG", "ffmpeg")
+
+
+# Generate a 16 kHz mono 32 kbps mp3 test tone of the given length
+def make_fixture_audio(path, seconds, bitrate="32k"):
+    if os.path.exists(path):
+        return path
+    subprocess.run(
+        [
+            ffmpeg_binary(),
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:sample_rate=16000:duration={seconds}",
+            "-ac",
+            "1",
+            "-b:a",
+            bitrate,
+            "-f",
+            "mp3",
+            path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return path
+
+
+# Generate "source" media like YouTube serves it: 48 kHz stereo opus in webm
+def make_fixture_media(path, seconds, bitrate="128k", pauses=None):
+    """
+    pauses=(speech, silence) mutes the tone for the last `silence` of every
+    speech + silence seconds, like dead air between a speaker's sentences
+    """
+    if os.path.exists(path):
+        return path
+    volume = []
+    if pauses:
+        speech, silence = pauses
+        volume = ["-af", f"volume='lt(mod(t,{speech + silence}),{speech})':eval=frame"]
+    subprocess.run(
+        [
+            ffmpeg_binary(),
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=220:sample_rate=48000:duration={seconds}",
+            *volume,
+            "-ac",
+            "2",
+            "-c:a",
+            "libopus",
+            "-b:a",
+            bitrate,
+            "-f",
+            "webm",
+            path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return path
+
+
+# A sentence of n random filler words, like one Whisper segment of speech
+def synthetic_sentence(rng, n):
+    words = [rng.choice(VOCAB) for _ in range(n)]
+    return " " + " ".join(words).capitalize() + rng.choice([".", ".", "?", ","])
+
+
+def _vtt_time(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{rest:06.3f}"
+
+
+# YouTube-style auto-generated captions: roll-up cues, no punctuation
+def make_fixture_captions(path, seconds, words_per_minute=150, seed=0):
+    """
+    Each line is shown for ~2.5 s with inline word timings, repeated as the
+    first line of the next cue after a 10 ms transition cue, as YouTube's
+    auto-captions are.
+    """
+    if os.path.exists(path):
+        return path
+    rng = random.Random(seed)
+    line_seconds = 2.5
+    words_per_line = max(1, round(words_per_minute / 60 * line_seconds))
+    blocks = ["WEBVTT\nKind: captions\nLanguage: en\n"]
+    previous = None
+    t = 0.0
+    while t + line_seconds <= seconds:
+        words = [rng.choice(VOCAB) for _ in range(words_per_line)]
+        step = line_seconds / len(words)
+        timed = words[0] + "".join(
+            f"<{_vtt_time(t + (i + 1) * step)}><c> {word}</c>"
+            for i, word in enumerate(words[1:])
+        )
+        end = t + line_seconds
+        blocks.append(
+            f"{_vtt_time(t)} --> {_vtt_time(end - 0.01)} align:start position:0%\n"
+            f"{previous if previous is not None else ' '}\n{timed}\n"
+        )
+        previous = " ".join(words)
+        blocks.append(
+            f"{_vtt_time(end - 0.01)} --> {_vtt_time(end)} align:start position:0%\n"
+            f"{previous}\n \n"
+        )
+        t = end
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(blocks))
+    return path
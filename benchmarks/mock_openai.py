@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the OpenAI HTTP API, for offline benchmarks.
+
+Run it on its own:
+
+    python benchmarks/mock_openai.py --port 8011 --latency 1.5
+
+or start it in-process with start_mock_server() and point an OpenAI client at
+the returned base_url.
+
+A chat reply takes latency seconds to its first word plus token_interval per
+further word; stream=True requests get the words as server-sent events as
+they are "generated", so time to first token can be measured.
+
+With rpm/tpm set, chat calls are held to that quota the way the real API
+does it: both refill continuously, prompt words plus max_tokens count as
+tokens, and a call over the quota gets a 429 with retry-after.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fixtures import synthetic_sentence
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _count(self, key):
+        with self.server.lock:
+            self.server.stats[key] = self.server.stats.get(key, 0) + 1
+
+    def _should_rate_limit(self):
+        with self.server.lock:
+            if self.server.fail_first > 0:
+                self.server.fail_first -= 1
+                return True
+        return random.random() < self.server.error_rate
+
+    # Seconds to wait if this call would exceed the quota, else None
+    def _over_quota(self, request):
+        server = self.server
+        if not server.rpm and not server.tpm:
+            return None
+        prompt = request["messages"][-1]["content"]
+        cost = {
+            "requests": 1,
+            "tokens": len(prompt.split()) + request.get("max_tokens", 0),
+        }
+        limits = {"requests": server.rpm, "tokens": server.tpm}
+        now = time.monotonic()
+        with server.lock:
+            # Both quotas refill continuously, a minute's worth at most
+            elapsed = now - server.quota_refilled
+            server.quota_refilled = now
+            wait = 0.0
+            for kind, limit in limits.items():
+                if limit:
+                    server.quota[kind] = min(
+                        limit, server.quota[kind] + elapsed * limit / 60
+                    )
+                    missing = cost[kind] - server.quota[kind]
+                    wait = max(wait, missing * 60 / limit)
+            if wait > 0:
+                return wait
+            for kind, limit in limits.items():
+                if limit:
+                    server.quota[kind] -= cost[kind]
+        return None
+
+    def do_POST(self):
+        raw = self._read_body()
+        if self.path.endswith("/chat/completions"):
+            self._count("chat")
+            if self._should_rate_limit():
+                self._count("rate_limited")
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "requests"}},
+                    headers={"retry-after": str(self.server.retry_after)},
+                )
+                return
+            request = json.loads(raw or b"{}")
+            wait = self._over_quota(request)
+            if wait is not None:
+                self._count("over_quota")
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                    headers={"retry-after": f"{wait:.2f}"},
+                )
+                return
+            self._chat_completion(request)
+        elif self.path.endswith("/audio/transcriptions"):
+            self._count("transcriptions")
+            self._transcription(raw)
+        else:
+            self._send_json(404, {"error": {"message": f"No route {self.path}"}})
+
+    def _chat_completion(self, request):
+        time.sleep(self.server.latency)
+        prompt = request["messages"][-1]["content"]
+        content = self.server.chat_reply or (
+            f"Summary of '{' '.join(prompt.split()[:3])}' ({len(prompt.split())} words)."
+        )
+        prompt_tokens = len(prompt.split())
+        completion_tokens = len(content.split())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if request.get("stream"):
+            self._stream_chat(request, content, usage)
+            return
+        # The whole reply is generated before anything is sent
+        time.sleep(completion_tokens * self.server.token_interval)
+        self._send_json(
+            200,
+            {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _send_chunk(self, payload):
+        data = b"data: " + (
+            payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        )
+        data += b"\n\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    # Server-sent events, one word per chunk, token_interval apart
+    def _stream_chat(self, request, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        base = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+        }
+        words = re.findall(r"\s*\S+", content)
+        started = time.perf_counter()
+        for i, word in enumerate(words):
+            # Sleep to a fixed schedule so the reply takes as long as unstreamed
+            time.sleep(
+                max(0.0, started + i * self.server.token_interval - time.perf_counter())
+            )
+            delta = {"content": word}
+            if i == 0:
+                delta["role"] = "assistant"
+            self._send_chunk(
+                {
+                    **base,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                }
+            )
+        self._send_chunk(
+            {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        )
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._send_chunk({**base, "choices": [], "usage": usage})
+        self._send_chunk(b"[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _uploaded_file(self, raw):
+        boundary = self.headers.get("Content-Type", "").split("boundary=")[-1]
+        for part in raw.split(b"--" + boundary.encode()):
+            head, _, body = part.partition(b"\r\n\r\n")
+            if b"filename=" in head:
+                return body[:-2] if body.endswith(b"\r\n") else body
+        return raw
+
+    def _transcription(self, raw):
+        # Estimate the audio length from the upload size at 32 kbps
+        duration = len(self._uploaded_file(raw)) * 8 / self.server.audio_bitrate
+        time.sleep(self.server.latency + duration * self.server.whisper_rate)
+        segments = []
+        t = 0.0
+        rng = random.Random(len(raw))
+        while duration - t > 0.5:  # the size estimate overshoots slightly
+            end = min(t + 6.0, duration)
+            if self.server.speech_wpm:
+                # Realistic amount of text for the segment length
+                text = synthetic_sentence(
+                    rng, max(1, round((end - t) * self.server.speech_wpm / 60))
+                )
+            else:
+                text = f" Mock sentence number {len(segments) + 1}."
+            segments.append(
+                {
+                    "id": len(segments),
+                    "seek": 0,
+                    "start": round(t, 2),
+                    "end": round(end, 2),
+                    "text": text,
+                    "tokens": [],
+                    "temperature": 0.0,
+                    "avg_logprob": -0.2,
+                    "compression_ratio": 1.2,
+                    "no_speech_prob": 0.01,
+                }
+            )
+            t = end
+        self._send_json(
+            200,
+            {
+                "task": "transcribe",
+                "language": "english",
+                "duration": duration,
+                "text": "".join(seg["text"] for seg in segments),
+                "segments": segments,
+            },
+        )
+
+
+# Start the mock server on a background thread
+def start_mock_server(
+    port=0,
+    latency=0.5,
+    error_rate=0.0,
+    fail_first=0,
+    retry_after=0.05,
+    chat_reply=None,
+    whisper_rate=0.001,
+    audio_bitrate=32000,
+    speech_wpm=0,
+    token_interval=0.0,
+    rpm=0,
+    tpm=0,
+):
+    """
+    Returns (server, base_url). Call server.shutdown() when done; request
+    counts are in server.stats.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.stats = {}
+    server.latency = latency
+    server.error_rate = error_rate
+    server.fail_first = fail_first
+    server.retry_after = retry_after
+    server.chat_reply = chat_reply
+    server.whisper_rate = whisper_rate  # seconds of processing per audio second
+    server.audio_bitrate = audio_bitrate
+    server.speech_wpm = speech_wpm  # 0 = short "Mock sentence number N." text
+    server.token_interval = token_interval  # seconds per generated reply word
+    server.rpm = rpm
+    server.tpm = tpm
+    server.quota = {"requests": rpm, "tokens": tpm}
+    server.quota_refilled = time.monotonic()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI API server")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=0, help="chat requests/min")
+    parser.add_argument("--tpm", type=int, default=0, help="chat tokens/min")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        token_interval=args.token_interval,
+        rpm=args.rpm,
+        tpm=args.tpm,
+    )
+    print(f"Mock OpenAI listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the usage webhook, for telemetry benchmarks.
+
+Run it on its own:
+
+    python benchmarks/telemetry_sink.py --port 8012 --latency 2
+
+or start it in-process with start_telemetry_sink() and set
+CLIPNOTES_TELEMETRY_URL to the returned URL. Received events are kept in
+server.events; set server.down = True to answer every post with a 503.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class TelemetrySinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        time.sleep(self.server.latency)
+
+        with self.server.lock:
+            self.server.posts += 1
+            down = self.server.down
+            if not down:
+                payload = json.loads(raw or b"[]")
+                # The old client posted one event per request
+                events = payload if isinstance(payload, list) else [payload]
+                self.server.events.extend(events)
+
+        body = b"unavailable" if down else b"ok"
+        self.send_response(503 if down else 200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_telemetry_sink(port=0, latency=0.0, down=False):
+    """
+    Returns (server, url). Call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), TelemetrySinkHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.events = []
+    server.posts = 0
+    server.latency = latency
+    server.down = down
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/usage"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Usage webhook stub")
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--down", action="store_true", help="answer 503 to every post")
+    args = parser.parse_args()
+
+    server, url = start_telemetry_sink(
+        port=args.port, latency=args.latency, down=args.down
+    )
+    print(f"Telemetry sink listening on {url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"{server.posts} posts, {len(server.events)} events")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
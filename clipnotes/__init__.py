@@ -0,0 +1,3 @@
+"""
+ClipNotes helpers shared by the Streamlit app and the benchmark scripts.
+"""
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Transcripts from a video's existing captions.
+
+yt-dlp is asked for subtitles only (--skip-download), manual or
+auto-generated, as WebVTT or YouTube's srv3 XML. The cues are parsed and
+normalized into the same {"start", "end", "text"} segments Whisper gives:
+sound descriptions such as [Music] are dropped so they never reach the
+summaries, YouTube's auto-captions repeat the previous line in every cue
+("roll-up" captions), so repeated lines are dropped, and the remaining
+lines are grouped into segments of at most CAPTION_SEGMENT_SECONDS that end
+early at sentence endings.
+"""
+
+import glob
+import html
+import os
+import re
+import subprocess
+import xml.etree.ElementTree as ET
+
+from clipnotes import metrics
+from clipnotes.media import print_progress, ytdlp_command
+from clipnotes.segments import SENTENCE_ENDINGS
+
+# Caption languages to ask yt-dlp for (its --sub-langs syntax)
+CAPTION_LANGUAGES = os.getenv("CLIPNOTES_CAPTION_LANGS", "en.*")
+CAPTION_FORMATS = ("vtt", "srv3")
+CAPTION_TIMEOUT = 60
+
+# Whisper segments are a few seconds long; caption segments are kept similar
+CAPTION_SEGMENT_SECONDS = 6.0
+
+TIMING = re.compile(
+    r"^((?:\d+:)?\d{1,2}:\d{2}[.,]\d{3})\s+-->\s+((?:\d+:)?\d{1,2}:\d{2}[.,]\d{3})"
+)
+TAG = re.compile(r"<[^>]*>")
+# Sound descriptions like [Music] or [Applause] and music notes aren't speech
+NON_SPEECH = re.compile(r"\[[^\]]*\]|♪+")
+
+
+# "01:02:03.456" or "02:03.456" (or with a comma, as in SRT) as seconds
+def parse_vtt_time(text):
+    seconds = 0.0
+    for part in text.replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _clean_line(line):
+    return " ".join(NON_SPEECH.sub(" ", html.unescape(TAG.sub("", line))).split())
+
+
+# WebVTT cues as {"start", "end", "lines"}
+def parse_vtt(text):
+    """
+    Cue settings, identifiers, NOTE/STYLE/REGION blocks, markup tags and
+    YouTube's inline word timings are dropped; lines are whitespace-collapsed
+    and empty ones removed.
+    """
+    cues = []
+    cue = None
+    for line in text.splitlines():
+        if not line:
+            # Only an empty line ends a cue; YouTube pads cues with " " lines
+            cue = None
+            continue
+        timing = TIMING.match(line.strip())
+        if timing:
+            cue = {
+                "start": parse_vtt_time(timing.group(1)),
+                "end": parse_vtt_time(timing.group(2)),
+                "lines": [],
+            }
+            cues.append(cue)
+        elif cue is not None:
+            cleaned = _clean_line(line)
+            if cleaned:
+                cue["lines"].append(cleaned)
+    return cues
+
+
+# YouTube srv3 (<timedtext format="3">) cues as {"start", "end", "lines"}
+def parse_srv3(text):
+    root = ET.fromstring(text)
+    cues = []
+    for p in root.iter("p"):
+        start = int(p.get("t", 0)) / 1000
+        lines = [_clean_line(line) for line in "".join(p.itertext()).split("\n")]
+        lines = [line for line in lines if line]
+        if lines:
+            cues.append(
+                {
+                    "start": start,
+                    "end": start + int(p.get("d", 0)) / 1000,
+                    "lines": lines,
+                }
+            )
+    return cues
+
+
+def parse_captions(text, fmt):
+    return parse_srv3(text) if fmt == "srv3" else parse_vtt(text)
+
+
+# Turn caption cues into transcript segments
+def caption_segments(cues, max_seconds=CAPTION_SEGMENT_SECONDS):
+    """
+    A line identical to the line shown just before it is a roll-up repeat
+    and is skipped. A cue is taken to end when the next one starts (srv3
+    cues overlap), and lines are joined into segments that close at a
+    sentence ending or before they would span more than max_seconds.
+    """
+    cues = sorted(cues, key=lambda cue: cue["start"])
+    segments = []
+    current = None
+    last_line = None
+    for i, cue in enumerate(cues):
+        end = cue["end"]
+        if i + 1 < len(cues) and cues[i + 1]["start"] > cue["start"]:
+            end = min(end, cues[i + 1]["start"])
+        for line in cue["lines"]:
+            if line == last_line:
+                continue
+            last_line = line
+            if current is not None and end - current["start"] > max_seconds:
+                segments.append(current)
+                current = None
+            if current is None:
+                current = {"start": cue["start"], "end": end, "text": line}
+            else:
+                current["end"] = max(current["end"], end)
+                current["text"] += " " + line
+            if current["text"].endswith(SENTENCE_ENDINGS):
+                segments.append(current)
+                current = None
+    if current is not None:
+        segments.append(current)
+    return segments
+
+
+# yt-dlp command that writes the video's caption files and nothing else
+def captions_command(strategy, url, output_template):
+    return [
+        *ytdlp_command(),
+        "--skip-download",
+        "--write-subs",
+        "--write-auto-subs",
+        "--sub-langs",
+        CAPTION_LANGUAGES,
+        "--sub-format",
+        "/".join(CAPTION_FORMATS),
+        *strategy,
+        "--output",
+        output_template,
+        url,
+    ]
+
+
+# Best caption file yt-dlp wrote for prefix: plain "en" first, then by format
+def _pick_caption_file(prefix):
+    found = []
+    for fmt_rank, fmt in enumerate(CAPTION_FORMATS):
+        for path in glob.glob(f"{glob.escape(prefix)}.*.{fmt}"):
+            lang = path[len(prefix) + 1 : -len(fmt) - 1]
+            found.append(((lang != "en", len(lang), fmt_rank), path, fmt))
+    if not found:
+        return None, None
+    _, path, fmt = min(found)
+    return path, fmt
+
+
+# Transcript segments from the video's captions, or None if it has none
+def fetch_captions(url, uid, workdir=".", strategy=(), progress=print_progress):
+    """
+    Never raises: any failure (no captions, yt-dlp error, unparseable file)
+    returns None so the caller can fall back to transcribing the audio.
+    """
+    prefix = os.path.join(workdir, f"captions_{uid}")
+    command = captions_command(list(strategy), url, prefix + ".%(ext)s")
+    progress("write", "💬 Looking for existing captions...")
+    try:
+        with metrics.span("captions") as counters:
+            result = subprocess.run(
+                command, capture_output=True, text=True, timeout=CAPTION_TIMEOUT
+            )
+            path, fmt = _pick_caption_file(prefix)
+            if result.returncode != 0 or path is None:
+                return None
+            with open(path, encoding="utf-8") as f:
+                segments = caption_segments(parse_captions(f.read(), fmt))
+            counters["segments"] = len(segments)
+    except (OSError, subprocess.SubprocessError, ET.ParseError, ValueError) as e:
+        progress("warning", f"⚠️ Could not read captions: {e}")
+        return None
+    finally:
+        for leftover in glob.glob(f"{glob.escape(prefix)}.*"):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+    return segments or None
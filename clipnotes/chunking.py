@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Token-budgeted transcript chunking.
+
+The transcript is tokenized once (one batched call over all segments or
+sentences) and chunks are cut on segment boundaries using the per-unit token
+counts, so the cost is linear in the transcript length.
+"""
+
+import re
+
+from clipnotes.segments import SegmentTable
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+# Split plain text into sentence units when no segments are available
+def _sentence_units(text):
+    return [
+        {"text": s, "start": None, "end": None}
+        for s in SENTENCE_END.split(text.strip())
+        if s
+    ]
+
+
+def _segment_units(segments):
+    table = SegmentTable.from_segments(segments)
+    units = []
+    for i in range(len(table)):
+        seg_text = table.text_at(i).strip()
+        if seg_text:
+            units.append(
+                {"text": seg_text, "start": table.starts[i], "end": table.ends[i]}
+            )
+    return units
+
+
+# Cut a single oversized unit on token offsets
+def _split_on_offsets(text, offsets, max_tokens):
+    pieces = []
+    for i in range(0, len(offsets), max_tokens):
+        window = offsets[i : i + max_tokens]
+        piece = text[window[0][0] : window[-1][1]].strip()
+        if piece:
+            pieces.append((piece, len(window)))
+    return pieces
+
+
+def _new_chunk():
+    return {"parts": [], "start": None, "end": None, "tokens": 0}
+
+
+def _close_chunk(chunk):
+    return {
+        "text": " ".join(chunk["parts"]),
+        "start": chunk["start"],
+        "end": chunk["end"],
+        "tokens": chunk["tokens"],
+    }
+
+
+# Chunking function
+def chunk_transcript(text, tokenizer, max_tokens=3000, segments=None):
+    """
+    Split a transcript into chunks of at most ~max_tokens tokens.
+
+    Chunks are aligned to Whisper segments when `segments` is given, and to
+    sentence boundaries otherwise. Each chunk is a dict with `text`, `start`,
+    `end` (seconds, None without segments) and `tokens`.
+    """
+    units = _segment_units(segments) if segments else _sentence_units(text)
+    if not units:
+        return []
+
+    # One batched tokenizer pass; the leading space matches how units are joined
+    encoded = tokenizer(
+        [" " + u["text"] for u in units],
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+    )
+
+    chunks = []
+    current = _new_chunk()
+
+    for unit, offsets in zip(units, encoded["offset_mapping"]):
+        n_tokens = len(offsets)
+
+        if n_tokens > max_tokens:
+            # A single unit is over budget: flush and cut it on token offsets
+            if current["parts"]:
+                chunks.append(_close_chunk(current))
+            shifted = [(max(a - 1, 0), max(b - 1, 0)) for a, b in offsets]
+            for piece, piece_tokens in _split_on_offsets(
+                unit["text"], shifted, max_tokens
+            ):
+                chunks.append(
+                    {
+                        "text": piece,
+                        "start": unit["start"],
+                        "end": unit["end"],
+                        "tokens": piece_tokens,
+                    }
+                )
+            current = _new_chunk()
+            continue
+
+        if current["parts"] and current["tokens"] + n_tokens > max_tokens:
+            chunks.append(_close_chunk(current))
+            current = _new_chunk()
+
+        current["parts"].append(unit["text"])
+        current["tokens"] += n_tokens
+        if current["start"] is None:
+            current["start"] = unit["start"]
+        current["end"] = unit["end"]
+
+    if current["parts"]:
+        chunks.append(_close_chunk(current))
+
+    return chunks
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Batch CLI: summarize every URL in a file and write one JSON line per URL.
+
+    python -m clipnotes.cli urls.txt --style bullets --out results.jsonl --workers 4
+
+Blank lines and lines starting with # are ignored. URLs that point to the same
+video are processed once. Transcripts go through the same on-disk store as the
+web app, so anything either of them has transcribed before is reused.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from clipnotes import metrics
+from clipnotes.pipeline import PipelineError, process_video, video_key
+from clipnotes.resources import get_openai_client
+from clipnotes.summarize import ALL_STYLES, SUMMARY_PROMPT_TEMPLATES
+from clipnotes.telemetry import flush_usage
+
+
+def read_urls(path):
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    urls = []
+    seen = set()
+    for line in lines:
+        if not line or line.startswith("#"):
+            continue
+        key = video_key(line)
+        if key in seen:
+            continue
+        seen.add(key)
+        urls.append(line)
+    return urls
+
+
+# Process one URL; top-level so process pools can pickle it
+def run_one(url, style, keep_transcript=False, with_stages=False):
+    def progress(kind, message):
+        print(f"[{url}] {message}", file=sys.stderr, flush=True)
+
+    client = get_openai_client(os.getenv("OPENAI_API_KEY"))
+    workdir = tempfile.mkdtemp(prefix="clipnotes_batch_")
+    started = time.perf_counter()
+    try:
+        with metrics.trace(url):
+            result = process_video(
+                client, url, style, workdir=workdir, progress=progress
+            )
+        result["status"] = "success"
+        if not keep_transcript:
+            del result["transcript_text"], result["segments"]
+        if with_stages:
+            result["stages"] = metrics.METRICS.trace(url)
+        return result
+    except PipelineError as e:
+        status, error = e.status, str(e)
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        # Pool worker processes exit without running atexit handlers
+        if multiprocessing.parent_process() is not None:
+            flush_usage()
+    return {
+        "url": url,
+        "style": style,
+        "status": status,
+        "error": error,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+# Add a span recorded in a worker process to this process's totals
+def replay_span(span):
+    span = dict(span)
+    stage, seconds, ok = span.pop("stage"), span.pop("seconds"), span.pop("ok")
+    span.pop("trace", None)
+    labels = {k: v for k, v in span.items() if isinstance(v, str)}
+    counters = {k: v for k, v in span.items() if k not in labels}
+    metrics.record(stage, seconds, ok, labels=labels, counters=counters)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Summarize a batch of YouTube URLs to JSONL"
+    )
+    parser.add_argument("urls", help="text file with one URL per line")
+    parser.add_argument(
+        "--style",
+        default="basic",
+        choices=sorted(SUMMARY_PROMPT_TEMPLATES) + [ALL_STYLES],
+        help=f"{ALL_STYLES} writes every style from one pass over the transcript",
+    )
+    parser.add_argument("--out", default="-", help="output JSONL file (- = stdout)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--executor",
+        choices=("thread", "process"),
+        default="thread",
+        help="processes avoid the GIL but don't share the in-memory LLM cache",
+    )
+    parser.add_argument(
+        "--keep-transcript",
+        action="store_true",
+        help="include transcript text and segments in each record",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="write per-stage totals here (Prometheus text for *.prom, else JSON) "
+        "and add each URL's stage timings to its record",
+    )
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    urls = read_urls(args.urls)
+    pool_class = (
+        ProcessPoolExecutor if args.executor == "process" else ThreadPoolExecutor
+    )
+    out = sys.stdout if args.out == "-" else open(args.out, "a", encoding="utf-8")
+    failures = 0
+
+    try:
+        with pool_class(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(
+                    run_one, url, args.style, args.keep_transcript, bool(args.metrics)
+                )
+                for url in urls
+            ]
+            # Records are written as they finish, so partial runs keep results
+            for future in as_completed(futures):
+                record = future.result()
+                failures += record["status"] != "success"
+                # Worker processes keep their own totals; fold them in here
+                if args.metrics and args.executor == "process":
+                    for span in record.get("stages", []):
+                        replay_span(span)
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.metrics:
+        metrics.write_metrics(args.metrics)
+    print(f"Processed {len(urls)} URLs, {failures} failed", file=sys.stderr, flush=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+In-process background jobs for the summarize flow.
+
+The web app submits a job and polls it instead of running the pipeline inside
+the Streamlit request. Requests for the same video and style attach to the
+job already in flight, and jobs for the same video in different styles share
+one download/transcription and one chunk notes pass through single-flight
+guards, so a video is never fetched, sent to Whisper or turned into notes
+twice at the same time. Chunk notes and streamed summary text are kept on the
+job as they arrive, so a poller can show them before the job finishes.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from clipnotes import metrics
+from clipnotes.pipeline import get_transcript, summarize_video, video_key
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# A BaseException, like asyncio.CancelledError, so the pipeline's
+# "except Exception" handlers let it through instead of reporting the stage
+# as failed (and failing every job waiting on a shared transcript)
+class JobCancelled(BaseException):
+    pass
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers for the same
+    key wait for and share its result (or exception)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, on_wait=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+
+        if not leader:
+            if on_wait is not None:
+                on_wait()
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class Job:
+    def __init__(self, job_id, key, url, style):
+        self.id = job_id
+        self.key = key
+        self.url = url
+        self.style = style
+        self.status = QUEUED
+        self.messages = []
+        self.partial = {"chunk": {}, "summary": {}}  # results so far, by kind
+        self.result = None
+        self.error = None
+        self.subscribers = 1
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+        self.cancel_requested = threading.Event()
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "url": self.url,
+            "style": self.style,
+            "status": self.status,
+            "messages": list(self.messages),
+            "partial": {kind: dict(items) for kind, items in self.partial.items()},
+            "result": self.result,
+            "error": self.error,
+            "subscribers": self.subscribers,
+        }
+
+
+class JobManager:
+    """
+    Bounded worker pool running summarize jobs with single-flight dedupe
+    """
+
+    def __init__(self, client, max_workers=2, max_pending=16, keep_finished=900):
+        self.client = client
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="clipnotes-job"
+        )
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}  # (video key, style) -> job id
+        self._ids = itertools.count(1)
+        self._transcripts = SingleFlight()
+        self._notes = SingleFlight()  # (video key, notes version) -> notes
+
+    def submit(self, url, style):
+        """
+        Returns the job ID; identical in-flight requests share one job.
+        Raises JobQueueFull when max_pending jobs are already waiting or running.
+        """
+        key = (video_key(url), style)
+        with self._lock:
+            self._prune()
+            active_id = self._active.get(key)
+            if active_id is not None:
+                job = self._jobs[active_id]
+                job.subscribers += 1
+                return job.id
+
+            pending = sum(job.status not in FINISHED for job in self._jobs.values())
+            if pending >= self.max_pending:
+                raise JobQueueFull(
+                    f"{pending} videos are already being processed, try again soon"
+                )
+
+            job = Job(f"job-{next(self._ids)}", key, url, style)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+            job.future = self._pool.submit(self._run, job)
+            self._publish_counts()
+            return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def cancel(self, job_id):
+        """
+        Detach one subscriber; the job is cancelled when nobody is left
+        waiting for it. Running jobs stop at their next progress update.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return
+            job.subscribers -= 1
+            if job.subscribers > 0:
+                return
+            job.cancel_requested.set()
+            # New requests for this video must not attach to a dying job
+            if self._active.get(job.key) == job.id:
+                del self._active[job.key]
+            if job.future.cancel():
+                self._finish(job, CANCELLED, error="Cancelled")
+
+    def stats(self):
+        with self._lock:
+            return self._counts()
+
+    def _counts(self):
+        counts = dict.fromkeys((QUEUED, RUNNING) + FINISHED, 0)
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    # Jobs per status as metrics gauges; called with self._lock held
+    def _publish_counts(self):
+        for status, count in self._counts().items():
+            metrics.set_gauge("jobs", count, status=status)
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        if self._active.get(job.key) == job.id:
+            del self._active[job.key]
+        self._publish_counts()
+
+    # Forget finished jobs nobody has polled for a while
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished
+        for job_id in [
+            job.id
+            for job in self._jobs.values()
+            if job.finished is not None and job.finished < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    # fn() through flight, or the result of the same key's call in flight;
+    # if that call's job is cancelled, run fn ourselves
+    def _shared(self, job, flight, key, fn, on_wait):
+        while True:
+            try:
+                return flight.do(key, fn, on_wait=on_wait)
+            except JobCancelled:
+                if job.cancel_requested.is_set():
+                    raise
+
+    # Fetch the transcript, sharing an in-flight fetch of the same video
+    def _shared_transcript(self, job, progress):
+        return self._shared(
+            job,
+            self._transcripts,
+            job.key[0],
+            lambda: get_transcript(
+                self.client, job.url, summary_type=job.style, progress=progress
+            ),
+            on_wait=lambda: progress(
+                "info",
+                "⏳ This video is already being fetched for another "
+                "request — waiting for it...",
+            ),
+        )
+
+    # Run a chunk notes pass, sharing one in flight for the same video
+    def _shared_notes(self, job, progress, key, fn):
+        return self._shared(
+            job,
+            self._notes,
+            key,
+            fn,
+            on_wait=lambda: progress(
+                "info",
+                "⏳ Notes on this video are already being written for another "
+                "request — waiting for them...",
+            ),
+        )
+
+    def _run(self, job):
+        with self._lock:
+            if job.cancel_requested.is_set():
+                self._finish(job, CANCELLED, error="Cancelled")
+                return
+            job.status = RUNNING
+            self._publish_counts()
+
+        def progress(kind, message):
+            if job.cancel_requested.is_set():
+                raise JobCancelled()
+            job.messages.append((kind, message))
+
+        def on_partial(kind, key, text):
+            if job.cancel_requested.is_set():
+                raise JobCancelled()
+            with self._lock:
+                job.partial[kind][key] = text
+
+        try:
+            with metrics.trace(job.id):
+                transcript = self._shared_transcript(job, progress)
+                summary = summarize_video(
+                    self.client,
+                    transcript,
+                    job.style,
+                    progress,
+                    on_partial,
+                    share_notes=lambda key, fn: self._shared_notes(
+                        job, progress, key, fn
+                    ),
+                )
+            result = {"transcript": transcript, **summary}
+        except JobCancelled:
+            with self._lock:
+                self._finish(job, CANCELLED, error="Cancelled")
+            return
+        except Exception as e:
+            with self._lock:
+                self._finish(job, FAILED, error=e)
+            return
+
+        with self._lock:
+            self._finish(job, DONE, result=result)
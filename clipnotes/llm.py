@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Chat completion helpers: retry with exponential backoff behind the shared
+rate limiter, an in-memory response cache, optional streaming of the reply
+as it is generated, and a bounded, order-preserving concurrent map for the
+chunk summary stage.
+"""
+
+import contextvars
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from clipnotes import metrics
+from clipnotes.resources import get_rate_limiter, get_tokenizer
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of chat completions with a per-entry TTL.
+
+    Each entry remembers how long the original call took and how many tokens
+    it used, so hits can be reported as latency and spend saved.
+    """
+
+    def __init__(self, max_entries=1024, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def make_key(model, temperature, prompt, max_tokens=None):
+        payload = json.dumps([model, temperature, max_tokens, prompt])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry["elapsed"]
+            self.saved_tokens += entry["tokens"]
+            return entry["content"]
+
+    def put(self, key, content, elapsed=0.0, tokens=0):
+        with self._lock:
+            self._entries[key] = {
+                "content": content,
+                "elapsed": elapsed,
+                "tokens": tokens,
+                "expires": time.time() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 2),
+                "saved_tokens": self.saved_tokens,
+            }
+
+
+# Rate limits and server errors are worth retrying, anything else is not
+def is_retryable(exc):
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # Connection errors and timeouts from the SDK carry no status code
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Call fn() with exponential backoff on 429/5xx
+def call_with_backoff(
+    fn, retries=5, base_delay=1.0, max_delay=30.0, limiter=None, tokens=0
+):
+    """
+    With a RateLimiter every attempt waits for admission (estimated at
+    tokens), and a 429 holds all of the limiter's callers, not just this one.
+    """
+    for attempt in range(retries + 1):
+        try:
+            if limiter is not None:
+                limiter.acquire(tokens)
+            return fn()
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * 2**attempt)
+                delay *= random.uniform(0.5, 1.0)  # jitter so workers spread out
+            if limiter is not None and getattr(e, "status_code", None) == 429:
+                limiter.hold(delay)
+            time.sleep(delay)
+
+
+# Consume a streamed completion; returns (content, usage)
+def _read_stream(stream, started, model, on_delta):
+    parts = []
+    usage = None
+    with stream:
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if not parts:
+                metrics.record(
+                    "chat_first_token",
+                    time.perf_counter() - started,
+                    labels={"model": model},
+                )
+            parts.append(chunk.choices[0].delta.content)
+            on_delta("".join(parts).strip())
+    return "".join(parts), usage
+
+
+# Chat completion with exponential backoff on 429/5xx
+def chat_complete(
+    client,
+    prompt,
+    model="gpt-4",
+    temperature=0.7,
+    max_tokens=900,
+    retries=5,
+    base_delay=1.0,
+    max_delay=30.0,
+    cache=None,
+    on_delta=None,
+    limiter=None,
+):
+    """
+    Run a single-message chat completion and return the stripped reply text.
+    When a ResponseCache is given, identical requests are answered from it.
+    Calls wait for the process-wide "chat" RateLimiter unless another
+    limiter is given.
+
+    With on_delta the reply is streamed, and on_delta(text) is called with
+    the reply so far each time more of it arrives (once with the whole reply
+    on a cache hit). A retried stream starts over from the beginning.
+    """
+    key = None
+    if cache is not None:
+        key = cache.make_key(model, temperature, prompt, max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.record(
+                "chat_completion", 0.0, labels={"model": model, "cache": "hit"}
+            )
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
+
+    request = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+    def complete():
+        if on_delta is None:
+            res = client.chat.completions.create(**request)
+            return res.choices[0].message.content, getattr(res, "usage", None)
+        sent = time.perf_counter()
+        stream = client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        return _read_stream(stream, sent, model, on_delta)
+
+    if limiter is None:
+        limiter = get_rate_limiter("chat")
+    estimate = 0
+    if limiter.counts_tokens:
+        # The API charges the quota for the prompt plus max_tokens up front
+        estimate = len(get_tokenizer().encode(prompt)) + max_tokens
+
+    started = time.perf_counter()
+    with metrics.span("chat_completion", model=model, cache="miss") as counters:
+        counters["prompt_bytes"] = len(prompt.encode())
+        content, usage = call_with_backoff(
+            complete,
+            retries=retries,
+            base_delay=base_delay,
+            max_delay=max_delay,
+            limiter=limiter,
+            tokens=estimate,
+        )
+        content = content.strip()
+        counters["prompt_tokens"] = getattr(usage, "prompt_tokens", 0) or 0
+        counters["completion_tokens"] = getattr(usage, "completion_tokens", 0) or 0
+        counters["reply_bytes"] = len(content.encode())
+    if cache is not None:
+        cache.put(
+            key,
+            content,
+            elapsed=time.perf_counter() - started,
+            tokens=getattr(usage, "total_tokens", 0) or 0,
+        )
+    return content
+
+
+# Concurrent map that keeps results in input order
+def map_concurrent(fn, items, max_workers=4, on_done=None):
+    """
+    Apply fn to every item on a thread pool of at most max_workers threads.
+
+    Results are returned in input order. on_done(index, result) is called in
+    the calling thread as each item finishes, so it is safe to update the
+    Streamlit UI from it.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        # Each task runs in a copy of the caller's context, so metrics spans
+        # recorded in worker threads keep the caller's trace
+        futures = {
+            pool.submit(contextvars.copy_context().run, fn, item): i
+            for i, item in enumerate(items)
+        }
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if on_done is not None:
+                    on_done(i, results[i])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results
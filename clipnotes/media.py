@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Audio download and transcoding.
+
+Two modes are supported:
+
+- buffered: yt-dlp extracts an mp3 to disk, then ffmpeg re-encodes it to
+  16 kHz mono in a second file (the original pipeline).
+- stream: yt-dlp writes the best audio stream to stdout, which is piped
+  straight into ffmpeg, so transcoding overlaps with the download and only
+  the final 16 kHz mono file is ever written.
+"""
+
+import os
+import shlex
+import subprocess
+import tempfile
+
+from clipnotes import metrics
+from clipnotes.strategies import StrategyScheduler
+
+USER_AGENT_DESKTOP = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+USER_AGENT_MOBILE = "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1"
+
+# yt-dlp options for each anti-blocking strategy, in default order
+DOWNLOAD_STRATEGIES = {
+    # Strategy 1: Use cookies file simulation and newest user agent
+    "desktop": [
+        "--user-agent",
+        USER_AGENT_DESKTOP,
+        "--add-header",
+        "Accept-Language:en-US,en;q=0.9",
+        "--add-header",
+        "Accept:text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "--sleep-interval",
+        "1",
+        "--max-sleep-interval",
+        "3",
+    ],
+    # Strategy 2: Simulate mobile browser
+    "mobile": [
+        "--user-agent",
+        USER_AGENT_MOBILE,
+        "--add-header",
+        "Accept-Language:en-US,en;q=0.9",
+        "--sleep-interval",
+        "2",
+    ],
+    # Strategy 3: Use very basic approach with delay
+    "basic": [
+        "--sleep-interval",
+        "3",
+        "--max-sleep-interval",
+        "5",
+        "--retries",
+        "3",
+    ],
+    # Strategy 4: Try with format selection
+    "format": ["-f", "bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio"],
+    # Strategy 5: Force IPv4 with delays
+    "ipv4": [
+        "--force-ipv4",
+        "--sleep-interval",
+        "2",
+        "--socket-timeout",
+        "30",
+    ],
+}
+
+DOWNLOAD_TIMEOUT = 240  # 4 minute timeout per attempt
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".webm", ".mp4")
+
+
+# Default progress callback when running outside Streamlit
+def print_progress(kind, message):
+    print(message)
+
+
+# yt-dlp command prefix; CLIPNOTES_YTDLP may hold a full command line
+def ytdlp_command():
+    return shlex.split(os.getenv("CLIPNOTES_YTDLP", "yt-dlp"))
+
+
+def ffmpeg_binary():
+    return os.getenv("CLIPNOTES_FFMPEG", "ffmpeg")
+
+
+# yt-dlp command that extracts an mp3 to output_filename
+def buffered_command(strategy, url, output_filename):
+    return [
+        *ytdlp_command(),
+        "-x",
+        "--audio-format",
+        "mp3",
+        *strategy,
+        "--output",
+        output_filename,
+        url,
+    ]
+
+
+# yt-dlp command that writes the raw audio stream to stdout
+def streaming_command(strategy, url):
+    format_args = [] if "-f" in strategy else ["-f", "bestaudio[ext=webm]/bestaudio"]
+    return [*ytdlp_command(), *format_args, *strategy, "--output", "-", url]
+
+
+# ffmpeg command producing the 16 kHz mono mp3 Whisper gets
+def transcode_command(input_file, output_file):
+    return [
+        ffmpeg_binary(),
+        "-y",
+        "-i",
+        input_file,
+        "-ar",
+        "16000",
+        "-ac",
+        "1",
+        "-ab",
+        "32k",  # Low bitrate
+        "-f",
+        "mp3",
+        output_file,
+    ]
+
+
+# More aggressive audio download function
+def download_audio_aggressive(
+    url, output_filename, progress=print_progress, scheduler=None, race=1
+):
+    """
+    Download audio with the most effective anti-blocking strategies.
+
+    Each strategy writes to its own "<name>.<strategy>.<ext>" variant of the
+    output template, so raced attempts never collide.
+    """
+    base = output_filename.replace(".%(ext)s", "")
+    directory = os.path.dirname(base) or "."
+
+    def start_attempt(name):
+        prefix = f"{base}.{name}."
+        return DownloadAttempt(
+            [buffered_command(DOWNLOAD_STRATEGIES[name], url, prefix + "%(ext)s")],
+            cleanup=lambda: _remove_matching(directory, os.path.basename(prefix)),
+        )
+
+    winner = _run_strategies(start_attempt, progress, scheduler, race, "buffered")
+    if winner is None:
+        return False
+    progress("success", f"✅ Audio downloaded successfully using strategy {winner}")
+    return True
+
+
+# Find the file yt-dlp produced for an output template prefix
+def find_downloaded_file(prefix, directory="."):
+    matches = sorted(
+        f
+        for f in os.listdir(directory)
+        if f.startswith(prefix) and f.endswith(AUDIO_EXTENSIONS)
+    )
+    if not matches:
+        return None
+    return os.path.join(directory, matches[0])
+
+
+# Improved compression function
+def compress_audio(input_file, output_file, progress=print_progress):
+    """
+    Compress audio file for transcription with error handling
+    """
+    ffmpeg_commands = [
+        # Primary command with aggressive compression
+        transcode_command(input_file, output_file),
+        # Fallback command
+        [
+            ffmpeg_binary(),
+            "-y",
+            "-i",
+            input_file,
+            "-ar",
+            "16000",
+            "-ac",
+            "1",
+            output_file,
+        ],
+    ]
+
+    for i, command in enumerate(ffmpeg_commands):
+        try:
+            progress("write", f"🔄 Compressing audio (method {i+1})...")
+            with metrics.span("compress", method=i + 1) as counters:
+                if os.path.exists(input_file):
+                    counters["input_bytes"] = os.path.getsize(input_file)
+                result = subprocess.run(
+                    command, check=False, capture_output=True, text=True, timeout=90
+                )
+
+            if result.returncode == 0:
+                progress("success", f"✅ Audio compressed successfully")
+                return True
+            else:
+                progress("warning", f"Compression method {i+1} failed")
+
+        except subprocess.TimeoutExpired:
+            progress("error", "Audio compression timed out")
+        except FileNotFoundError:
+            progress(
+                "error",
+                "❌ ffmpeg not found. This tool requires ffmpeg to be installed.",
+            )
+            return False
+        except Exception as e:
+            progress("warning", f"Compression method {i+1} failed: {str(e)}")
+
+    return False
+
+
+def _read_log(log_file):
+    log_file.seek(0)
+    return log_file.read().decode(errors="replace")
+
+
+def _remove_matching(directory, prefix):
+    for f in os.listdir(directory):
+        if f.startswith(prefix):
+            try:
+                os.remove(os.path.join(directory, f))
+            except OSError:
+                pass
+
+
+class DownloadAttempt:
+    """
+    One running strategy: yt-dlp alone, or yt-dlp piped into ffmpeg.
+
+    poll() returns None while running and (ok, error_text) once finished;
+    kill() stops the processes and removes partial output.
+    """
+
+    def __init__(self, commands, output_file=None, cleanup=None):
+        self.output_file = output_file
+        self.cleanup = cleanup
+        self.processes = []
+        self.logs = []
+        self.outcome = None
+
+        stdin = None
+        try:
+            for i, command in enumerate(commands):
+                log = tempfile.TemporaryFile()
+                self.logs.append(log)
+                last = i == len(commands) - 1
+                proc = subprocess.Popen(
+                    command,
+                    stdin=stdin,
+                    stdout=subprocess.DEVNULL if last else subprocess.PIPE,
+                    stderr=log,
+                )
+                if stdin is not None:
+                    # Only the next process holds the read end, so it sees EOF
+                    stdin.close()
+                stdin = proc.stdout
+                self.processes.append(proc)
+        except BaseException:
+            self.kill()
+            raise
+
+    def poll(self):
+        if self.outcome is not None:
+            return self.outcome
+        codes = [proc.poll() for proc in self.processes]
+        if any(code is None for code in codes):
+            # A failed downloader means the transcoder won't get valid input
+            if codes[0] not in (None, 0):
+                self._kill_processes()
+                codes = [proc.returncode for proc in self.processes]
+            else:
+                return None
+
+        for proc, log in zip(self.processes, self.logs):
+            if proc.returncode != 0:
+                error = _read_log(log) or f"{proc.args[0]} exit {proc.returncode}"
+                return self._finish(False, error)
+        if self.output_file is not None and (
+            not os.path.exists(self.output_file)
+            or os.path.getsize(self.output_file) == 0
+        ):
+            return self._finish(False, "no audio produced")
+        return self._finish(True, "")
+
+    def _finish(self, ok, error):
+        self.outcome = (ok, error)
+        for log in self.logs:
+            log.close()
+        if not ok and self.cleanup is not None:
+            self.cleanup()
+        return self.outcome
+
+    def _kill_processes(self):
+        for proc in self.processes:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    def kill(self):
+        self._kill_processes()
+        if self.outcome is None:
+            self._finish(False, "cancelled")
+
+
+# Run strategies in order (or through an adaptive scheduler) until one works
+def _run_strategies(start_attempt, progress, scheduler=None, race=1, mode=""):
+    if scheduler is None:
+        scheduler = StrategyScheduler(DOWNLOAD_STRATEGIES, adaptive=False)
+    with metrics.span("download", mode=mode):
+        return scheduler.run(
+            start_attempt, race=race, timeout=DOWNLOAD_TIMEOUT, progress=progress
+        )
+
+
+# Streaming download + transcode
+def download_audio_streaming(
+    url, output_file, progress=print_progress, scheduler=None, race=1
+):
+    """
+    Try download strategies with yt-dlp piped into ffmpeg; output_file is the
+    16 kHz mono mp3 ready for Whisper
+    """
+    root, ext = os.path.splitext(output_file)
+
+    def start_attempt(name):
+        attempt_file = f"{root}.{name}{ext}"
+        return DownloadAttempt(
+            [
+                streaming_command(DOWNLOAD_STRATEGIES[name], url),
+                transcode_command("pipe:0", attempt_file),
+            ],
+            output_file=attempt_file,
+            cleanup=lambda: (
+                os.remove(attempt_file) if os.path.exists(attempt_file) else None
+            ),
+        )
+
+    winner = _run_strategies(start_attempt, progress, scheduler, race, "stream")
+    if winner is None:
+        return False
+    os.replace(f"{root}.{winner}{ext}", output_file)
+    progress("success", f"✅ Audio downloaded and compressed using strategy {winner}")
+    return True
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Stage timing and token metrics for the pipeline.
+
+Each stage runs inside `with span("stage", label=value) as counters:` and
+adds numbers (tokens, bytes, ...) to the counters dict. A finished span
+updates process-wide totals per stage and labels, and is also kept in a
+bounded list of recent spans tagged with the current trace (one trace per
+job or CLI URL), so a single run can be broken down afterwards.
+
+Gauges hold a current value (such as a queue depth) instead of a total.
+Totals and gauges render as JSON or Prometheus text, and can be written to
+a file or served over HTTP.
+"""
+
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_current_trace = contextvars.ContextVar("clipnotes_trace", default=None)
+
+
+class Metrics:
+    """
+    Thread-safe per-stage totals and gauges plus a ring buffer of recent spans
+    """
+
+    def __init__(self, max_spans=2000):
+        self._lock = threading.Lock()
+        self._totals = {}  # (stage, sorted label items) -> totals dict
+        self._gauges = {}  # (name, sorted label items) -> value
+        self._spans = deque(maxlen=max_spans)
+
+    def record(self, stage, seconds, ok=True, labels=None, counters=None):
+        labels = {k: str(v) for k, v in (labels or {}).items()}
+        counters = counters or {}
+        span = {
+            "stage": stage,
+            "trace": _current_trace.get(),
+            "seconds": seconds,
+            "ok": ok,
+            **labels,
+            **counters,
+        }
+        key = (stage, tuple(sorted(labels.items())))
+        with self._lock:
+            totals = self._totals.setdefault(
+                key, {"count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            )
+            totals["count"] += 1
+            totals["errors"] += int(not ok)
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+            self._spans.append(span)
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    @contextlib.contextmanager
+    def span(self, stage, **labels):
+        counters = {}
+        started = time.perf_counter()
+        ok = True
+        try:
+            yield counters
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(
+                stage,
+                time.perf_counter() - started,
+                ok,
+                labels=labels,
+                counters=counters,
+            )
+
+    # Recent spans of one trace, oldest first
+    def trace(self, trace_id):
+        with self._lock:
+            return [span for span in self._spans if span["trace"] == trace_id]
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._totals.items())
+            gauges = sorted(self._gauges.items())
+        return {
+            "stages": [
+                {"stage": stage, **dict(labels), **totals}
+                for (stage, labels), totals in items
+            ],
+            "gauges": [
+                {"gauge": name, **dict(labels), "value": value}
+                for (name, labels), value in gauges
+            ],
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        with self._lock:
+            items = sorted(self._totals.items())
+            gauges = sorted(self._gauges.items())
+        series = {}
+        for (stage, labels), totals in items:
+            label_text = ",".join(f'{k}="{v}"' for k, v in (("stage", stage),) + labels)
+            for name, value in totals.items():
+                metric = (
+                    f"clipnotes_stage_{name}"
+                    if name == "max_seconds"
+                    else f"clipnotes_stage_{name}_total"
+                )
+                series.setdefault(metric, []).append(
+                    f"{metric}{{{label_text}}} {value}"
+                )
+        for (name, labels), value in gauges:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            series.setdefault(f"clipnotes_{name}", []).append(
+                f"clipnotes_{name}{{{label_text}}} {value}"
+            )
+        lines = []
+        for metric, samples in series.items():
+            kind = "counter" if metric.endswith("_total") else "gauge"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._gauges.clear()
+            self._spans.clear()
+
+
+# Metrics shared by everything in this process
+METRICS = Metrics()
+
+
+def span(stage, **labels):
+    return METRICS.span(stage, **labels)
+
+
+def record(stage, seconds, ok=True, labels=None, counters=None):
+    METRICS.record(stage, seconds, ok, labels=labels, counters=counters)
+
+
+def set_gauge(name, value, **labels):
+    METRICS.set_gauge(name, value, **labels)
+
+
+# Trace id of the current context (None outside any trace)
+def current_trace():
+    return _current_trace.get()
+
+
+# Tag spans recorded in this context (and threads started from it) with trace_id
+@contextlib.contextmanager
+def trace(trace_id):
+    token = _current_trace.set(trace_id)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+# Write the totals to path: Prometheus text for *.prom, JSON otherwise
+def write_metrics(path, metrics=METRICS):
+    text = metrics.to_prometheus() if path.endswith(".prom") else metrics.to_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = self.server.metrics.to_prometheus()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = self.server.metrics.to_json()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# Serve /metrics (Prometheus) and /metrics.json from a daemon thread
+def serve_metrics(port, host="127.0.0.1", metrics=METRICS):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
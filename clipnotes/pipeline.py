@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+Headless ClipNotes pipeline: URL -> transcript -> summary.
+
+The transcript comes from the shared store, else from the video's own
+captions, else from downloading the audio and sending it to Whisper.
+
+Nothing here touches Streamlit. Progress is reported through a
+progress(kind, message) callback (kind is a Streamlit call name such as
+"write", "info", "success", "warning" or "error"), and failures raise
+PipelineError, so the same code drives the web app and the batch CLI.
+"""
+
+import hashlib
+import os
+import time
+from datetime import datetime
+
+from clipnotes.captions import fetch_captions
+from clipnotes.media import (
+    DOWNLOAD_STRATEGIES,
+    compress_audio,
+    download_audio_aggressive,
+    download_audio_streaming,
+    find_downloaded_file,
+    print_progress,
+)
+from clipnotes.resources import (
+    get_download_scheduler,
+    get_response_cache,
+    get_search_indexes,
+    get_tokenizer,
+    get_transcript_store,
+)
+from clipnotes.search import SearchIndex, build_search_index
+from clipnotes.segments import SegmentTable, sentence_index
+from clipnotes.summarize import (
+    ALL_STYLES,
+    NOTES_VERSION,
+    styles_for,
+    summarize_styles,
+)
+from clipnotes.telemetry import log_usage
+from clipnotes.transcribe import transcribe_parallel
+from clipnotes.trim import trim_audio
+from clipnotes.youtube import canonical_video_id
+
+# Long audio is split into pieces this long and transcribed in parallel
+WHISPER_PIECE_SECONDS = int(os.getenv("CLIPNOTES_WHISPER_PIECE_SECONDS", "600"))
+WHISPER_CONCURRENCY = int(os.getenv("CLIPNOTES_WHISPER_CONCURRENCY", "4"))
+
+# "stream" pipes yt-dlp into ffmpeg, "buffered" downloads then compresses
+DOWNLOAD_MODE = os.getenv("CLIPNOTES_DOWNLOAD_MODE", "stream")
+
+# Number of download strategies raced in parallel (1 = one at a time)
+DOWNLOAD_RACE = int(os.getenv("CLIPNOTES_DOWNLOAD_RACE", "1"))
+
+# Try the video's captions before downloading audio ("0" always uses Whisper)
+USE_CAPTIONS = os.getenv("CLIPNOTES_CAPTIONS", "1") != "0"
+
+# Cut pauses out of the audio before Whisper ("1"), and speed it up by TEMPO
+# (atempo, 0.5-2.0); timestamps are mapped back to the original video
+TRIM_SILENCE = os.getenv("CLIPNOTES_TRIM_SILENCE", "0") == "1"
+TEMPO = float(os.getenv("CLIPNOTES_TEMPO", "1.0"))
+
+METHOD_LABELS = {
+    "whisper": "Whisper Audio Transcription",
+    "captions": "YouTube Captions",
+}
+
+
+class PipelineError(Exception):
+    """
+    A pipeline stage failed; status is the usage-log status for it
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Hash function for caching (fallback key for non-YouTube URLs)
+def url_hash(url):
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+# Cache key for a URL: the YouTube video ID when there is one
+def video_key(url):
+    return canonical_video_id(url) or url_hash(url)
+
+
+def _remove_files(*paths):
+    for path in set(paths):
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Cleanup error: {e}")
+
+
+# An index derived from a transcript, from the store or built and stored now
+def _stored_index(transcript_store, uid, name, build):
+    try:
+        index = transcript_store.get_index(uid, name)
+    except Exception as e:
+        print(f"Transcript store index read failed: {e}")
+        index = None
+    if index is None:
+        index = build()
+        try:
+            transcript_store.put_index(uid, name, index)
+        except Exception as e:
+            print(f"Transcript store index write failed: {e}")
+    return index
+
+
+# Sentence and search indexes for a transcript, kept in the store with it
+def _transcript_indexes(transcript_store, uid, segments):
+    return {
+        "sentence_starts": _stored_index(
+            transcript_store, uid, "sentences", lambda: sentence_index(segments)
+        ),
+        "search_index": transcript_search_index(uid, segments, transcript_store),
+    }
+
+
+# The transcript's SearchIndex, loaded once per process and shared by every
+# session searching it
+def transcript_search_index(uid, segments, transcript_store=None):
+    """
+    Loaded from the store, or built from segments if the store has lost it
+    """
+    if transcript_store is None:
+        transcript_store = get_transcript_store()
+    return get_search_indexes().get(
+        uid,
+        lambda: SearchIndex.from_dict(
+            _stored_index(
+                transcript_store,
+                uid,
+                "search",
+                lambda: build_search_index(segments),
+            )
+        ),
+    )
+
+
+# Download and compress audio, returning (original_file, compressed_file)
+def fetch_audio(url, uid, workdir=".", progress=print_progress):
+    audio_filename = os.path.join(workdir, f"downloaded_{uid}.%(ext)s")
+    compressed_filename = os.path.join(workdir, f"compressed_{uid}.mp3")
+
+    # Try to download audio with aggressive strategies
+    if DOWNLOAD_MODE == "stream":
+        downloaded = download_audio_streaming(
+            url,
+            compressed_filename,
+            progress=progress,
+            scheduler=get_download_scheduler(),
+            race=DOWNLOAD_RACE,
+        )
+    else:
+        downloaded = download_audio_aggressive(
+            url,
+            audio_filename,
+            progress=progress,
+            scheduler=get_download_scheduler(),
+            race=DOWNLOAD_RACE,
+        )
+    if not downloaded:
+        raise PipelineError(
+            "all_download_methods_failed", "❌ **All download strategies failed.**"
+        )
+
+    if DOWNLOAD_MODE == "stream":
+        # yt-dlp was piped straight into ffmpeg, there is only one file
+        return compressed_filename, compressed_filename
+
+    # Find the actual downloaded file
+    actual_audio_file = find_downloaded_file(f"downloaded_{uid}", workdir)
+    if actual_audio_file is None:
+        raise PipelineError(
+            "download_file_missing", "❌ Could not find downloaded audio file"
+        )
+    progress("success", f"✅ Audio file ready: {actual_audio_file}")
+
+    # Compress audio for transcription
+    if not compress_audio(actual_audio_file, compressed_filename, progress=progress):
+        progress("warning", "⚠️ Compression failed, using original file...")
+        compressed_filename = actual_audio_file
+    return actual_audio_file, compressed_filename
+
+
+# Whisper segments for a URL: download, compress, transcribe
+def _whisper_segments(client, url, uid, summary_type, workdir, progress):
+    progress(
+        "info",
+        "🔄 **Starting download process...** This may take a few minutes due to YouTube's anti-bot measures. The tool will try multiple strategies automatically.",
+    )
+    try:
+        actual_audio_file, compressed_filename = fetch_audio(
+            url, uid, workdir, progress
+        )
+    except PipelineError as e:
+        log_usage(url, summary_type, status=e.status)
+        raise
+
+    time_map = None
+    trimmed_filename = os.path.join(workdir, f"trimmed_{uid}.mp3")
+    if TRIM_SILENCE or TEMPO != 1.0:
+        progress("write", "✂️ Trimming the audio for Whisper...")
+        time_map = trim_audio(
+            compressed_filename,
+            trimmed_filename,
+            cut_pauses=TRIM_SILENCE,
+            tempo=TEMPO,
+            progress=progress,
+        )
+
+    # Transcription with Whisper
+    progress("write", "🎤 Transcribing audio with OpenAI Whisper...")
+    try:
+        segments = transcribe_parallel(
+            client,
+            trimmed_filename if time_map else compressed_filename,
+            piece_seconds=WHISPER_PIECE_SECONDS,
+            max_workers=WHISPER_CONCURRENCY,
+            on_done=lambda i, total: progress(
+                "write", f"🎤 Transcribed piece {i+1} of {total}"
+            ),
+        )
+    except Exception as e:
+        log_usage(url, summary_type, status="transcription_failed")
+        raise PipelineError(
+            "transcription_failed", f"❌ Transcription failed: {e}"
+        ) from e
+    finally:
+        # Clean up temporary files
+        _remove_files(actual_audio_file, compressed_filename, trimmed_filename)
+
+    if time_map:
+        segments = time_map.remap_segments(segments)
+    progress("success", "✅ Transcription completed successfully!")
+    progress("info", "🧹 Temporary files cleaned up")
+    return segments
+
+
+# Transcript for a URL, from the shared store, captions or download + Whisper
+def get_transcript(client, url, summary_type="", workdir=".", progress=print_progress):
+    """
+    Returns {"video_id", "text", "segments", "sentence_starts",
+    "search_index", "source", "method"}; segments is a SegmentTable whose
+    text is the transcript text, source is "store", "captions" or
+    "whisper", and method is how the transcript was made ("captions" or
+    "whisper"). sentence_starts (segments.sentence_index()) and the
+    search_index data are kept in the store with the transcript;
+    search_index is the SearchIndex shared through transcript_search_index().
+    """
+    uid = video_key(url)
+    transcript_store = get_transcript_store()
+
+    stored = transcript_store.get(uid)
+    if stored is not None:
+        progress("info", "📋 Transcript found in the shared cache — skipping download.")
+        return {
+            "video_id": uid,
+            "text": stored["text"],
+            "segments": stored["segments"],
+            **_transcript_indexes(transcript_store, uid, stored["segments"]),
+            "source": "store",
+            "method": stored["metadata"].get("method", "whisper"),
+        }
+
+    progress("success", f"📥 Processing URL: {url}")
+    segments = None
+    if USE_CAPTIONS:
+        # Same yt-dlp options as the download strategy most likely to work
+        strategy = DOWNLOAD_STRATEGIES[get_download_scheduler().order()[0]]
+        segments = fetch_captions(url, uid, workdir, strategy, progress)
+    if segments is not None:
+        method = "captions"
+        progress(
+            "success",
+            f"✅ Using the video's captions ({len(segments)} segments) — "
+            "no audio download needed.",
+        )
+    else:
+        method = "whisper"
+        segments = _whisper_segments(client, url, uid, summary_type, workdir, progress)
+
+    segments = SegmentTable.from_segments(segments)
+    transcript_text = segments.text
+    try:
+        transcript_store.put(
+            uid,
+            transcript_text,
+            segments,
+            metadata={
+                "url": url,
+                "method": method,
+                "created": datetime.utcnow().isoformat(),
+            },
+        )
+    except Exception as e:
+        print(f"Transcript store write failed: {e}")
+    indexes = _transcript_indexes(transcript_store, uid, segments)
+
+    log_usage(url, summary_type, status="success", method=method)
+    return {
+        "video_id": uid,
+        "text": transcript_text,
+        "segments": segments,
+        **indexes,
+        "source": method,
+        "method": method,
+    }
+
+
+# Chunk notes stored for a transcript, or None
+def _stored_notes(transcript_store, uid):
+    try:
+        return transcript_store.get_index(uid, "chunk_notes")
+    except Exception as e:
+        print(f"Transcript store index read failed: {e}")
+        return None
+
+
+# Summary of a transcript from get_transcript(), reusing stored chunk notes
+def summarize_video(
+    client,
+    transcript,
+    style,
+    progress=print_progress,
+    on_partial=None,
+    share_notes=None,
+):
+    """
+    Returns the summarize_styles() result without "notes". For a single
+    style the text is under "summary"; for ALL_STYLES "summaries" maps each
+    style to its text. on_partial is passed on to summarize_styles().
+
+    share_notes(key, fn), if given, runs a chunk notes pass (fn) for key =
+    (video ID, NOTES_VERSION); JobManager passes one that lets concurrent
+    jobs for the same video wait for a pass already running instead of
+    starting another.
+    """
+    transcript_store = get_transcript_store()
+    uid = transcript["video_id"]
+
+    # Notes made by a pass that finished after we looked are in the store;
+    # new ones are stored as soon as they are made
+    def notes_pass(make_notes):
+        notes = _stored_notes(transcript_store, uid)
+        if notes is not None and notes.get("version") == NOTES_VERSION:
+            return notes
+        notes = make_notes()
+        try:
+            transcript_store.put_index(uid, "chunk_notes", notes)
+        except Exception as e:
+            print(f"Transcript store index write failed: {e}")
+        return notes
+
+    result = summarize_styles(
+        client,
+        get_tokenizer(),
+        transcript["text"],
+        transcript["segments"],
+        styles_for(style),
+        cache=get_response_cache(),
+        progress=progress,
+        notes=_stored_notes(transcript_store, uid),
+        on_partial=on_partial,
+        method=METHOD_LABELS.get(transcript["method"], transcript["method"]),
+        share_notes=(
+            notes_pass
+            if share_notes is None
+            else lambda make_notes: share_notes(
+                (uid, NOTES_VERSION), lambda: notes_pass(make_notes)
+            )
+        ),
+    )
+    result.pop("notes")
+    if style != ALL_STYLES:
+        result["summary"] = result.pop("summaries")[style]
+    return result
+
+
+# Full pipeline for one URL
+def process_video(client, url, style, workdir=".", progress=print_progress):
+    """
+    Returns a JSON-serializable result dict with the transcript and summary
+    """
+    started = time.perf_counter()
+    transcript = get_transcript(client, url, style, workdir, progress)
+    summary = summarize_video(client, transcript, style, progress)
+    return {
+        "url": url,
+        "video_id": transcript["video_id"],
+        "style": style,
+        "transcript_source": transcript["source"],
+        "transcript_text": transcript["text"],
+        "segments": transcript["segments"].to_list(),
+        **summary,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+    }
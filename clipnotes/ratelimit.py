@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide admission control for OpenAI calls.
+
+Every session's chat and Whisper calls pass through one RateLimiter per API,
+which holds token buckets for requests per minute and tokens per minute
+(OpenAI's two quotas) and only lets a call through once both have room, so
+the process as a whole stays under its quota instead of collecting 429s.
+
+Calls that have to wait are admitted in start-time fair queuing order
+between tenants (the metrics trace: one per job or CLI URL), weighted by
+their token estimate. A session with one short call queued behind another
+session's long run of calls gets its turn next instead of after all of them.
+
+A 429 that gets through anyway (another process on the same key, or a quota
+set too high) holds every caller for its retry-after, not only the one that
+got it. A limit of 0 means unlimited.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from clipnotes import metrics
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min token buckets with fair queuing
+    """
+
+    def __init__(self, name, requests_per_minute=0, tokens_per_minute=0):
+        self.name = name
+        self.limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._available = dict(self.limits)  # buckets start full
+        self._refilled = time.monotonic()
+        self._hold_until = 0.0
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (finish tag, sequence number, start tag)
+        self._finish_tags = {}  # tenant -> finish tag of its latest call
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+
+    # Whether callers need to estimate tokens at all
+    @property
+    def counts_tokens(self):
+        return self.limits["tokens"] > 0
+
+    def _refill(self, now):
+        elapsed = now - self._refilled
+        self._refilled = now
+        for kind, limit in self.limits.items():
+            if limit:
+                self._available[kind] = min(
+                    limit, self._available[kind] + elapsed * limit / 60
+                )
+
+    # Seconds until cost fits in the buckets; a cost larger than a whole
+    # bucket only waits for a full one
+    def _delay(self, cost, now):
+        delay = self._hold_until - now
+        for kind, amount in cost.items():
+            limit = self.limits[kind]
+            if limit:
+                missing = min(amount, limit) - self._available[kind]
+                delay = max(delay, missing * 60 / limit)
+        return max(delay, 0.0)
+
+    def _publish_depth(self):
+        metrics.set_gauge("rate_limit_queue_depth", len(self._queue), limiter=self.name)
+
+    # Block until a call estimated at tokens may be sent
+    def acquire(self, tokens=0, tenant=None):
+        """
+        tenant defaults to the current metrics trace
+        """
+        if tenant is None:
+            tenant = metrics.current_trace()
+        cost = {"requests": 1, "tokens": tokens}
+        started = time.perf_counter()
+        with self._cond:
+            start = max(self._virtual_time, self._finish_tags.get(tenant, 0.0))
+            finish = start + (max(tokens, 1) if self.counts_tokens else 1)
+            self._finish_tags[tenant] = finish
+            entry = (finish, next(self._sequence), start)
+            heapq.heappush(self._queue, entry)
+            self._publish_depth()
+            try:
+                while True:
+                    delay = None  # not our turn: wait to be notified
+                    if self._queue[0] is entry:
+                        now = time.monotonic()
+                        self._refill(now)
+                        delay = self._delay(cost, now)
+                        if delay == 0:
+                            break
+                    self._cond.wait(delay)
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._publish_depth()
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            for kind, amount in cost.items():
+                if self.limits[kind]:
+                    self._available[kind] -= min(amount, self.limits[kind])
+            self._virtual_time = start
+            self._finish_tags = {
+                key: tag for key, tag in self._finish_tags.items() if tag > start
+            }
+            self._publish_depth()
+            self._cond.notify_all()
+        waited = time.perf_counter() - started
+        metrics.record(
+            "rate_limit_wait",
+            waited,
+            labels={"limiter": self.name},
+            counters={"tokens": tokens, "throttled": int(waited >= 0.01)},
+        )
+
+    # Admit nobody for the next seconds (the API answered 429)
+    def hold(self, seconds):
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+        metrics.record("rate_limit_hold", seconds, labels={"limiter": self.name})
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry of heavy, shareable resources.
+
+Streamlit re-executes the app script on every interaction, but imported
+modules live for the whole process, so resources built here are created
+lazily on first use and then shared by every rerun, session and worker
+thread. Heavy imports (openai, transformers) happen inside the factories.
+"""
+
+import atexit
+import functools
+import os
+import threading
+import time
+
+_registry = {}
+_key_locks = {}
+_registry_lock = threading.Lock()
+_load_seconds = {}
+
+
+# Build a resource on first call, then return the same object for those args
+def lazy_resource(factory):
+    @functools.wraps(factory)
+    def wrapper(*args):
+        key = (factory.__name__, args)
+        if key in _registry:
+            return _registry[key]
+        with _registry_lock:
+            lock = _key_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in _registry:
+                started = time.perf_counter()
+                _registry[key] = factory(*args)
+                _load_seconds[factory.__name__] = time.perf_counter() - started
+        return _registry[key]
+
+    return wrapper
+
+
+# How long each resource took to build, for startup timing
+def resource_timings():
+    return dict(_load_seconds)
+
+
+@lazy_resource
+def get_openai_client(api_key):
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
+@lazy_resource
+def get_tokenizer():
+    from transformers import GPT2TokenizerFast
+
+    return GPT2TokenizerFast.from_pretrained("gpt2")
+
+
+# Transcript store shared across sessions and restarts
+@lazy_resource
+def get_transcript_store():
+    from clipnotes.store import TranscriptStore
+
+    max_mb = int(os.getenv("CLIPNOTES_TRANSCRIPT_CACHE_MB", "512"))
+    return TranscriptStore(max_bytes=max_mb * 1024 * 1024)
+
+
+# Download strategy stats, learned across sessions and persisted to disk
+@lazy_resource
+def get_download_scheduler():
+    from clipnotes.media import DOWNLOAD_STRATEGIES
+    from clipnotes.strategies import StrategyScheduler
+
+    return StrategyScheduler(DOWNLOAD_STRATEGIES)
+
+
+# GPT-4 response cache shared by all sessions in this process
+@lazy_resource
+def get_response_cache():
+    from clipnotes.llm import ResponseCache
+
+    ttl_hours = float(os.getenv("CLIPNOTES_LLM_CACHE_TTL_HOURS", "168"))
+    return ResponseCache(max_entries=2048, ttl=ttl_hours * 3600)
+
+
+# Loaded transcript search indexes, one per video for all sessions
+@lazy_resource
+def get_search_indexes():
+    from clipnotes.search import SearchIndexCache
+
+    return SearchIndexCache(
+        max_entries=int(os.getenv("CLIPNOTES_SEARCH_INDEX_CACHE", "16"))
+    )
+
+
+# Admission control for one OpenAI API ("chat" or "whisper"), shared by all
+# sessions; CLIPNOTES_CHAT_RPM / CLIPNOTES_CHAT_TPM etc., 0 = unlimited
+@lazy_resource
+def get_rate_limiter(api):
+    from clipnotes.ratelimit import RateLimiter
+
+    prefix = f"CLIPNOTES_{api.upper()}"
+    return RateLimiter(
+        api,
+        requests_per_minute=float(os.getenv(f"{prefix}_RPM", "0")),
+        tokens_per_minute=float(os.getenv(f"{prefix}_TPM", "0")),
+    )
+
+
+# Background summarize jobs shared by all sessions in this process
+@lazy_resource
+def get_job_manager(api_key):
+    from clipnotes.jobs import JobManager
+
+    return JobManager(
+        get_openai_client(api_key),
+        max_workers=int(os.getenv("CLIPNOTES_JOB_WORKERS", "2")),
+        max_pending=int(os.getenv("CLIPNOTES_JOB_QUEUE", "16")),
+    )
+
+
+# Usage telemetry queue, flushed by a background thread and again at exit
+@lazy_resource
+def get_usage_reporter():
+    from clipnotes.store import default_cache_dir
+    from clipnotes.telemetry import WEBHOOK_URL, UsageReporter
+
+    reporter = UsageReporter(
+        WEBHOOK_URL,
+        timeout=float(os.getenv("CLIPNOTES_TELEMETRY_TIMEOUT", "5")),
+        flush_interval=float(os.getenv("CLIPNOTES_TELEMETRY_FLUSH_SECONDS", "5")),
+        spool_path=os.path.join(default_cache_dir(), "telemetry_spool.jsonl"),
+    )
+    atexit.register(reporter.flush)
+    return reporter
+
+
+# /metrics endpoint, served only when CLIPNOTES_METRICS_PORT is set
+@lazy_resource
+def get_metrics_server():
+    from clipnotes.metrics import serve_metrics
+
+    port = os.getenv("CLIPNOTES_METRICS_PORT")
+    if not port:
+        return None
+    return serve_metrics(
+        int(port), host=os.getenv("CLIPNOTES_METRICS_HOST", "127.0.0.1")
+    )
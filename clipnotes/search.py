@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Inverted-index search over transcript segments.
+
+Every word of the transcript gets a global position (word number across all
+segments). The index maps each term to the sorted positions it occurs at,
+plus the position of each segment's first word, so a hit maps back to its
+segment with a bisect. Queries are terms (all must occur in the segment),
+"quoted phrases" (consecutive positions, may run across a segment boundary)
+and prefixes ending in *.
+
+The index is plain lists and dicts, so it can be stored as JSON next to its
+transcript. Loaded indexes are kept in a SearchIndexCache, one per video for
+the whole process, rather than one per session viewing it.
+"""
+
+import heapq
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from clipnotes.segments import SegmentTable
+
+WORD = re.compile(r"[\w']+")
+QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    return WORD.findall(text.lower())
+
+
+# Index terms of a query part; a trailing * marks the last one as a prefix
+def query_terms(text):
+    terms = []
+    for word in text.split():
+        tokens = tokenize(word)
+        if tokens and word.endswith("*"):
+            tokens[-1] += "*"
+        terms.extend(tokens)
+    return terms
+
+
+class SearchIndex:
+    """
+    Positional inverted index of one transcript
+    """
+
+    def __init__(self, postings, segment_offsets):
+        self.postings = postings  # term -> sorted word positions
+        self.segment_offsets = segment_offsets  # first word position per segment
+        self._terms = sorted(postings)
+
+    @classmethod
+    def build(cls, segments):
+        table = SegmentTable.from_segments(segments)
+        postings = {}
+        segment_offsets = []
+        position = 0
+        for i in range(len(table)):
+            segment_offsets.append(position)
+            for term in tokenize(table.text_at(i)):
+                postings.setdefault(term, []).append(position)
+                position += 1
+        return cls(postings, segment_offsets)
+
+    def to_dict(self):
+        return {"postings": self.postings, "segment_offsets": self.segment_offsets}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["postings"], data["segment_offsets"])
+
+    # Sorted positions of every term starting with prefix
+    def _prefix_positions(self, prefix):
+        first = bisect_left(self._terms, prefix)
+        last = bisect_right(self._terms, prefix + "\U0010ffff")
+        lists = [self.postings[term] for term in self._terms[first:last]]
+        if len(lists) == 1:
+            return lists[0]
+        return list(heapq.merge(*lists))
+
+    def _term_positions(self, term):
+        if term.endswith("*"):
+            return self._prefix_positions(term[:-1])
+        return self.postings.get(term, [])
+
+    # Start positions of the terms appearing consecutively; later terms are
+    # looked up in their sorted positions, so nothing is copied per query
+    def _phrase_positions(self, terms):
+        starts = self._term_positions(terms[0])
+        for offset, term in enumerate(terms[1:], start=1):
+            if not starts:
+                break
+            following = self._term_positions(term)
+            starts = [p for p in starts if _contains(following, p + offset)]
+        return starts
+
+    def segment_of(self, position):
+        return bisect_right(self.segment_offsets, position) - 1
+
+    def search(self, query, limit=None):
+        """
+        Return the numbers of the segments matching every part of the query,
+        in transcript order (at most limit of them)
+        """
+        matches = None
+        for phrase, word in QUERY_PART.findall(query):
+            terms = query_terms(phrase or word)
+            if not terms:
+                continue
+            positions = self._phrase_positions(terms)
+            segments = {self.segment_of(p) for p in positions}
+            matches = segments if matches is None else matches & segments
+            if not matches:
+                return []
+        return sorted(matches or ())[:limit]
+
+
+class SearchIndexCache:
+    """
+    Thread-safe LRU of loaded SearchIndexes by video ID
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_id, load):
+        """
+        Return the index for video_id, calling load() for it if it isn't
+        cached
+        """
+        with self._lock:
+            index = self._entries.get(video_id)
+            if index is not None:
+                self._entries.move_to_end(video_id)
+                return index
+        index = load()
+        with self._lock:
+            # Another session may have loaded it meanwhile; keep one copy
+            index = self._entries.setdefault(video_id, index)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+
+def _contains(positions, position):
+    i = bisect_left(positions, position)
+    return i < len(positions) and positions[i] == position
+
+
+# Build an index for segments, as stored next to the transcript
+def build_search_index(segments):
+    return SearchIndex.build(segments).to_dict()
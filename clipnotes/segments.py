@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for working with Whisper transcript segments.
+
+A finished transcript's segments are held in a SegmentTable: start and end
+times in two float arrays and every segment's text in one string (the
+transcript text itself) with an array of offsets. That is a few dozen bytes
+per segment instead of a dict, two floats and a str object each, and it is
+what every Streamlit session viewing the transcript keeps. The helpers
+below accept a table or a plain list of segments.
+"""
+
+from array import array
+from bisect import bisect_right
+
+SENTENCE_ENDINGS = (".", "?", "!")
+
+# Unpunctuated text (auto-generated captions) is cut into "sentences" this long
+MAX_SENTENCE_SEGMENTS = 5
+
+
+# Read a field from an OpenAI segment object or a plain dict
+def segment_field(seg, name, default=None):
+    if isinstance(seg, dict):
+        return seg.get(name, default)
+    return getattr(seg, name, default)
+
+
+class SegmentTable:
+    """
+    Read-only, columnar transcript segments.
+
+    text is the segment texts joined by single spaces; segment i is
+    text[offsets[i] : offsets[i + 1] - 1]. Indexing and iterating give
+    {"start", "end", "text"} dicts, built on demand.
+    """
+
+    __slots__ = ("starts", "ends", "text", "offsets")
+
+    def __init__(self, starts, ends, text, offsets):
+        self.starts = starts  # array("d")
+        self.ends = ends  # array("d")
+        self.text = text
+        self.offsets = offsets  # array("q"), one more than there are segments
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        Build a table from dicts or OpenAI segment objects; a table is
+        returned as is
+        """
+        if isinstance(segments, cls):
+            return segments
+        starts = array("d")
+        ends = array("d")
+        offsets = array("q", [0])
+        texts = []
+        for seg in segments:
+            text = segment_field(seg, "text", "") or ""
+            starts.append(float(segment_field(seg, "start", 0.0)))
+            ends.append(float(segment_field(seg, "end", 0.0)))
+            offsets.append(offsets[-1] + len(text) + 1)
+            texts.append(text)
+        return cls(starts, ends, " ".join(texts), offsets)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_at(self, i):
+        return self.text[self.offsets[i] : self.offsets[i + 1] - 1]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return {"start": self.starts[i], "end": self.ends[i], "text": self.text_at(i)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_list(self):
+        return list(self)
+
+    def to_dict(self, with_text=True):
+        """
+        JSON-serializable columns; without text, from_dict() needs it passed
+        back in (the transcript store keeps it in its own column)
+        """
+        data = {
+            "start": self.starts.tolist(),
+            "end": self.ends.tolist(),
+            "offsets": self.offsets.tolist(),
+        }
+        if with_text:
+            data["text"] = self.text
+        return data
+
+    @classmethod
+    def from_dict(cls, data, text=None):
+        return cls(
+            array("d", data["start"]),
+            array("d", data["end"]),
+            data["text"] if text is None else text,
+            array("q", data["offsets"]),
+        )
+
+
+# Format seconds as m:ss for display
+def format_timestamp(seconds):
+    seconds = int(seconds or 0)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+# Keep only the segment fields the app uses, as plain dicts
+def normalize_segments(segments):
+    return [
+        {
+            "start": float(segment_field(seg, "start", 0.0)),
+            "end": float(segment_field(seg, "end", 0.0)),
+            "text": segment_field(seg, "text", ""),
+        }
+        for seg in segments
+    ]
+
+
+# Parse "h:mm:ss", "m:ss" or plain seconds; None if it isn't a time
+def parse_timestamp(text):
+    try:
+        parts = [float(part) for part in text.strip().split(":")]
+    except ValueError:
+        return None
+    if not 1 <= len(parts) <= 3 or any(part < 0 for part in parts):
+        return None
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds
+
+
+# Index of the segment each sentence starts at
+def sentence_index(segments):
+    """
+    A sentence runs from its first segment up to and including the next
+    segment whose text ends in . ? or !, the grouping the transcript viewer
+    shows with one timestamp per sentence. A sentence is also cut after
+    MAX_SENTENCE_SEGMENTS segments.
+    """
+    table = SegmentTable.from_segments(segments)
+    starts = []
+    in_sentence = False
+    for i in range(len(table)):
+        if not in_sentence:
+            starts.append(i)
+            in_sentence = True
+        if (
+            table.text_at(i).rstrip().endswith(SENTENCE_ENDINGS)
+            or i - starts[-1] + 1 >= MAX_SENTENCE_SEGMENTS
+        ):
+            in_sentence = False
+    return starts
+
+
+# Start time of every sentence, for finding the sentence at a given time
+def sentence_times(segments, starts):
+    table = SegmentTable.from_segments(segments)
+    return [table.starts[i] for i in starts]
+
+
+# Sentence number being spoken at the given time
+def sentence_at(times, seconds):
+    return max(0, bisect_right(times, seconds) - 1)
+
+
+# Sentences first..last-1 as (start_seconds, text), touching only their segments
+def sentence_window(segments, starts, first, last):
+    table = SegmentTable.from_segments(segments)
+    last = min(last, len(starts))
+    window = []
+    for n in range(max(0, first), last):
+        end = starts[n + 1] if n + 1 < len(starts) else len(table)
+        text = " ".join(table.text_at(i).strip() for i in range(starts[n], end))
+        window.append((table.starts[starts[n]], text))
+    return window
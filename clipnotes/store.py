@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk transcript store shared by every session and process.
+
+Transcripts are kept in SQLite (WAL mode, so readers never block each other)
+keyed by the canonical YouTube video ID. The total stored size is bounded and
+the least recently used transcripts are evicted first. Segments are stored
+as SegmentTable columns (times and text offsets) that point into the text
+column, so the transcript text is stored only once.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from clipnotes.segments import SegmentTable
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "clipnotes")
+
+
+def default_cache_dir():
+    return os.getenv("CLIPNOTES_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+class TranscriptStore:
+    """
+    Size-bounded LRU store of transcript text, segments and metadata
+    """
+
+    def __init__(self, path=None, max_bytes=512 * 1024 * 1024):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "transcripts.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._write_lock = threading.Lock()
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    segments TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS transcripts_lru ON transcripts (accessed_at)"
+            )
+            # Derived data (sentence index, ...) stored with its transcript
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcript_indexes (
+                    video_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (video_id, name)
+                )
+                """
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    # One short-lived connection per call keeps the store safe across threads
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, video_id):
+        """
+        Return {"text", "segments" (a SegmentTable), "metadata"} or None if
+        not stored
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT text, segments, metadata FROM transcripts WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            with conn:
+                conn.execute(
+                    "UPDATE transcripts SET accessed_at = ? WHERE video_id = ?",
+                    (time.time(), video_id),
+                )
+        finally:
+            conn.close()
+
+        segments = json.loads(row[1])
+        if isinstance(segments, list):
+            # Stored before segments were kept as columns
+            segments = SegmentTable.from_segments(segments)
+        else:
+            segments = SegmentTable.from_dict(
+                segments, text=segments.get("text", row[0])
+            )
+        return {"text": row[0], "segments": segments, "metadata": json.loads(row[2])}
+
+    def put(self, video_id, text, segments, metadata=None):
+        table = SegmentTable.from_segments(segments)
+        segments_json = json.dumps(
+            table.to_dict(with_text=table.text != text), separators=(",", ":")
+        )
+        metadata_json = json.dumps(metadata or {}, separators=(",", ":"))
+        size = len(text.encode()) + len(segments_json) + len(metadata_json)
+        now = time.time()
+
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    # Indexes built from an older version of this transcript
+                    conn.execute(
+                        "DELETE FROM transcript_indexes WHERE video_id = ?", (video_id,)
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            video_id,
+                            text,
+                            segments_json,
+                            metadata_json,
+                            size,
+                            now,
+                            now,
+                        ),
+                    )
+                    self._evict(conn)
+            finally:
+                conn.close()
+
+    def get_index(self, video_id, name):
+        """
+        Return a stored index for a transcript, or None
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data FROM transcript_indexes WHERE video_id = ? AND name = ?",
+                (video_id, name),
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row is not None else None
+
+    # Store an index next to its transcript; its size counts toward max_bytes
+    def put_index(self, video_id, name, data):
+        data_json = json.dumps(data, separators=(",", ":"))
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    if (
+                        conn.execute(
+                            "SELECT 1 FROM transcripts WHERE video_id = ?", (video_id,)
+                        ).fetchone()
+                        is None
+                    ):
+                        return
+                    old = conn.execute(
+                        "SELECT size FROM transcript_indexes "
+                        "WHERE video_id = ? AND name = ?",
+                        (video_id, name),
+                    ).fetchone()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO transcript_indexes VALUES (?, ?, ?, ?)",
+                        (video_id, name, data_json, len(data_json)),
+                    )
+                    conn.execute(
+                        "UPDATE transcripts SET size = size + ? WHERE video_id = ?",
+                        (len(data_json) - (old[0] if old else 0), video_id),
+                    )
+                    self._evict(conn)
+            finally:
+                conn.close()
+
+    # Drop least recently used transcripts until the store fits in max_bytes
+    def _evict(self, conn):
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM transcripts"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT video_id, size FROM transcripts ORDER BY accessed_at ASC"
+        ).fetchall()
+        for video_id, size in rows[:-1]:  # never evict the newest entry
+            conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+            conn.execute(
+                "DELETE FROM transcript_indexes WHERE video_id = ?", (video_id,)
+            )
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"transcripts": count, "bytes": total, "max_bytes": self.max_bytes}
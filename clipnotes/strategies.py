@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive scheduling of yt-dlp download strategies.
+
+Per-strategy success rate and latency are tracked as exponentially weighted
+averages and persisted to a JSON file, so every process starts with what
+earlier runs learned. Strategies are tried in order of expected time to a
+successful download, optionally racing the top few in parallel.
+"""
+
+import json
+import os
+import threading
+import time
+
+from clipnotes import metrics
+from clipnotes.store import default_cache_dir
+
+ALPHA = 0.3  # weight of the newest observation
+PRIOR_SUCCESS = 0.5
+PRIOR_LATENCY = 60.0
+POLL_INTERVAL = 0.2
+
+
+class StrategyScheduler:
+    """
+    Orders strategies by learned stats and runs download attempts
+    """
+
+    def __init__(self, names, stats_path=None, adaptive=True):
+        if stats_path is None:
+            stats_path = os.path.join(default_cache_dir(), "download_stats.json")
+        self.names = list(names)
+        self.stats_path = stats_path
+        self.adaptive = adaptive  # False keeps the given order and records nothing
+        self._lock = threading.Lock()
+        self._stats = self._load() if adaptive else {}
+        if adaptive:
+            self.publish_metrics()
+
+    def _load(self):
+        try:
+            with open(self.stats_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.stats_path)), exist_ok=True)
+        tmp_path = f"{self.stats_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._stats, f, indent=2)
+        os.replace(tmp_path, self.stats_path)
+
+    def record(self, name, ok, elapsed):
+        metrics.record("download_attempt", elapsed, ok, labels={"strategy": name})
+        if not self.adaptive:
+            return
+        with self._lock:
+            entry = self._stats.setdefault(
+                name,
+                {
+                    "success_rate": PRIOR_SUCCESS,
+                    "latency": PRIOR_LATENCY,
+                    "attempts": 0,
+                    "successes": 0,
+                },
+            )
+            entry["attempts"] += 1
+            entry["successes"] += int(ok)
+            entry["success_rate"] += ALPHA * (float(ok) - entry["success_rate"])
+            entry["latency"] += ALPHA * (elapsed - entry["latency"])
+            entry["last_used"] = time.time()
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Could not save download stats: {e}")
+        self.publish_metrics()
+
+    # Expected seconds until a success if we keep retrying this strategy
+    def expected_cost(self, name):
+        entry = self._stats.get(name)
+        if entry is None:
+            return PRIOR_LATENCY / PRIOR_SUCCESS
+        return entry["latency"] / max(entry["success_rate"], 0.01)
+
+    def order(self):
+        if not self.adaptive:
+            return list(self.names)
+        with self._lock:
+            # sorted() is stable, so ties keep the default strategy order
+            return sorted(self.names, key=self.expected_cost)
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(self._stats.get(name, {})) for name in self.names}
+
+    # Learned success rate and latency per strategy, as metrics gauges
+    def publish_metrics(self):
+        for name, entry in self.stats().items():
+            if entry:
+                metrics.set_gauge(
+                    "download_strategy_success_rate",
+                    entry["success_rate"],
+                    strategy=name,
+                )
+                metrics.set_gauge(
+                    "download_strategy_latency_seconds", entry["latency"], strategy=name
+                )
+
+    def run(self, start_attempt, race=1, timeout=240, progress=None):
+        """
+        Try strategies in learned order, keeping up to `race` attempts running.
+
+        start_attempt(name) must return an object with poll() -> None while
+        running or (ok, error_text) when finished, and kill(). Returns the
+        name of the winning strategy, or None if every strategy failed. Losers
+        still running when a strategy wins are killed and not counted as
+        failures.
+        """
+        pending = self.order()
+        total = len(pending)
+        running = {}
+
+        def report(kind, message):
+            if progress is not None:
+                progress(kind, message)
+
+        try:
+            while pending or running:
+                while pending and len(running) < max(1, race):
+                    name = pending.pop(0)
+                    report(
+                        "write",
+                        f"🔄 Trying download strategy {name} "
+                        f"({total - len(pending)}/{total})...",
+                    )
+                    try:
+                        running[name] = (start_attempt(name), time.monotonic())
+                    except FileNotFoundError as e:
+                        report("error", f"❌ Required tool not found: {e.filename}")
+                        return None
+                    except Exception as e:
+                        report("warning", f"❌ Strategy {name} exception: {e}")
+                        self.record(name, False, 0.0)
+
+                time.sleep(POLL_INTERVAL)
+                for name, (attempt, started) in list(running.items()):
+                    elapsed = time.monotonic() - started
+                    outcome = attempt.poll()
+                    if outcome is None and elapsed > timeout:
+                        attempt.kill()
+                        del running[name]
+                        self.record(name, False, elapsed)
+                        report(
+                            "warning",
+                            f"⏱️ Strategy {name} timed out after {timeout:.0f}s",
+                        )
+                        continue
+                    if outcome is None:
+                        continue
+
+                    del running[name]
+                    ok, error = outcome
+                    self.record(name, ok, elapsed)
+                    if ok:
+                        return name
+                    report("warning", f"❌ Strategy {name} failed")
+                    if error:
+                        preview = error[:150] + "..." if len(error) > 150 else error
+                        report("text", f"Error: {preview}")
+            return None
+        finally:
+            for attempt, _ in running.values():
+                attempt.kill()
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+GPT-4 summarization of a transcript.
+
+Short transcripts are summarized in a single call per style. Long ones are
+split into chunks and each chunk is turned into style-neutral notes (points,
+claims, facts and key quotes). The notes are merged in a tree of
+token-budgeted batches, at most REDUCE_FAN_IN per batch and in parallel,
+until they fit one prompt, and each style is then one call over the merged
+notes. Notes don't depend on the style, so they are kept and reused when
+another style, or every style at once, is requested for the same transcript.
+
+Callers that show results as they arrive pass on_partial(kind, key, text):
+it gets each chunk's notes as that chunk finishes ("chunk", chunk index) and
+each summary as it streams in ("summary", style, the reply so far).
+"""
+
+import hashlib
+import os
+
+from clipnotes import metrics
+from clipnotes.chunking import chunk_transcript
+from clipnotes.llm import chat_complete, map_concurrent
+from clipnotes.media import print_progress
+
+# Max number of chunk summaries requested from GPT-4 at the same time
+MAP_CONCURRENCY = int(os.getenv("CLIPNOTES_MAP_CONCURRENCY", "4"))
+
+MODEL_CONTEXT_TOKENS = 8192
+SUMMARY_MAX_TOKENS = 900
+
+# Max number of summaries condensed by one call in the reduce tree
+REDUCE_FAN_IN = int(os.getenv("CLIPNOTES_REDUCE_FAN_IN", "8"))
+
+# Room left for the template's instructions in a condensing prompt
+PROMPT_OVERHEAD_TOKENS = 100
+
+SUMMARY_PROMPT_TEMPLATES = {
+    "basic": "Summarize the following transcript in 5–7 clear sentences.\n\n{transcript}",
+    "bullets": "Summarize the transcript in 5–10 key bullet points.\n\n{transcript}",
+    "quotes": "Extract 5–10 powerful quotes that capture the speaker's ideas. Do not include timestamps.\n\n{transcript}",
+    "insights": "List 5–7 strategic takeaways with explanations.\n\n{transcript}",
+    "newbie": "Explain 5–7 key ideas in simple terms.\n\n{transcript}",
+}
+
+# Style passed to summarize every style at once
+ALL_STYLES = "all"
+
+CHUNK_NOTES_PROMPT = (
+    "Write dense notes on this part of a transcript as short bullet points: "
+    "every main point, claim, argument, fact and number, plus 3–5 notable "
+    "quotes copied verbatim in quotation marks. No introduction.\n\n{transcript}"
+)
+
+NOTES_MERGE_PROMPT = (
+    "Merge these notes on consecutive parts of a transcript into one set of "
+    "dense bullet-point notes. Keep every distinct point, claim, fact and "
+    "number, and the most notable verbatim quotes.\n\n{combined}"
+)
+
+NOTES_PROMPT_TEMPLATES = {
+    "basic": "Using these notes on a transcript, summarize it in one cohesive paragraph of 5–7 clear sentences.\n\n{combined}",
+    "bullets": "Using these notes on a transcript, summarize it in a single bullet-point list of 5–10 key points.\n\n{combined}",
+    "quotes": "From the quotes in these notes on a transcript, select the 5–10 most powerful ones that capture the speaker's ideas. Do not add timestamps.\n\n{combined}",
+    "insights": "Using these notes on a transcript, list 5–7 strategic takeaways with explanations.\n\n{combined}",
+    "newbie": "Using these notes on a transcript, explain its 5–7 key ideas in simple terms for someone new to the topic.\n\n{combined}",
+}
+
+# Stored notes made with other prompts or chunk sizes are not reused
+CHUNK_TOKENS = 3000
+NOTES_VERSION = hashlib.sha1(
+    f"{CHUNK_NOTES_PROMPT}|{NOTES_MERGE_PROMPT}|{CHUNK_TOKENS}".encode()
+).hexdigest()[:12]
+
+
+def styles_for(style):
+    return list(SUMMARY_PROMPT_TEMPLATES) if style == ALL_STYLES else [style]
+
+
+# Split summaries into consecutive groups that each fit one condensing prompt
+def group_summaries(token_counts, budget, fan_in):
+    """
+    Returns lists of indexes into token_counts. A group is closed when the
+    next summary would take it over budget tokens or past fan_in summaries.
+    """
+    groups = []
+    current = []
+    current_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > budget or len(current) >= fan_in):
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+# Merge notes level by level until they fit a single prompt
+def merge_notes(
+    client,
+    tokenizer,
+    notes,
+    cache=None,
+    progress=print_progress,
+    max_workers=MAP_CONCURRENCY,
+    fan_in=REDUCE_FAN_IN,
+):
+    """
+    Returns (notes, levels): notes that fit one prompt together, and one
+    {"summaries", "groups", "input_tokens"} entry per level of the tree, the
+    last being the batch the final per-style calls read.
+    """
+    budget = MODEL_CONTEXT_TOKENS - SUMMARY_MAX_TOKENS - PROMPT_OVERHEAD_TOKENS
+    fan_in = max(2, fan_in)
+    levels = []
+
+    while True:
+        token_counts = [len(tokenizer.encode(n)) for n in notes]
+        groups = group_summaries(token_counts, budget, fan_in)
+        levels.append(
+            {
+                "summaries": len(notes),
+                "groups": len(groups),
+                "input_tokens": sum(token_counts),
+            }
+        )
+        if len(groups) == 1:
+            return notes, levels
+        if len(groups) == len(notes):
+            # No two notes fit one prompt, so another level would change
+            # nothing and the tree would never finish
+            raise RuntimeError(
+                f"Cannot merge {len(notes)} sets of notes: no two of them fit "
+                f"in one {budget}-token prompt"
+            )
+
+        progress(
+            "write",
+            f"🔄 Merging {len(notes)} sets of notes in {len(groups)} groups "
+            f"(level {len(levels)})...",
+        )
+        prompts = [
+            NOTES_MERGE_PROMPT.replace(
+                "{combined}", "\n\n".join(notes[i] for i in group)
+            )
+            for group in groups
+        ]
+        with metrics.span("reduce", level=len(levels)) as counters:
+            counters["input_tokens"] = sum(token_counts)
+            # A group of one has nothing to merge; it moves up unchanged
+            notes = map_concurrent(
+                lambda i: (
+                    notes[groups[i][0]]
+                    if len(groups[i]) == 1
+                    else chat_complete(client, prompts[i], cache=cache)
+                ),
+                range(len(groups)),
+                max_workers=max_workers,
+            )
+
+
+# Style-neutral notes for a long transcript: one map pass plus the merge tree
+def chunk_notes(
+    client,
+    tokenizer,
+    transcript_text,
+    segments,
+    cache=None,
+    progress=print_progress,
+    max_workers=MAP_CONCURRENCY,
+    on_partial=None,
+):
+    """
+    Returns {"version", "notes", "spans", "merged", "levels"}: per-chunk
+    notes and their (start, end) times, the merged notes the styles are
+    written from, and the merge levels. JSON-serializable, so it can be
+    stored next to the transcript.
+    """
+    progress(
+        "warning",
+        "📝 Transcript is long — using intelligent chunking for better results.",
+    )
+    with metrics.span("chunking") as counters:
+        chunks = chunk_transcript(
+            transcript_text, tokenizer, max_tokens=CHUNK_TOKENS, segments=segments
+        )
+        counters["chunks"] = len(chunks)
+    chunk_prompts = [
+        CHUNK_NOTES_PROMPT.replace("{transcript}", chunk["text"]) for chunk in chunks
+    ]
+    progress("write", f"🧠 Analyzing {len(chunks)} chunks ({max_workers} at a time)...")
+    finished = []
+
+    def report_chunk(i, notes):
+        finished.append(i)
+        progress("write", f"✅ Chunk {i+1} done ({len(finished)} of {len(chunks)})")
+        if on_partial is not None:
+            on_partial("chunk", i, notes)
+
+    notes = map_concurrent(
+        lambda prompt: chat_complete(client, prompt, cache=cache),
+        chunk_prompts,
+        max_workers=max_workers,
+        on_done=report_chunk,
+    )
+    merged, levels = merge_notes(
+        client,
+        tokenizer,
+        notes,
+        cache=cache,
+        progress=progress,
+        max_workers=max_workers,
+    )
+    return {
+        "version": NOTES_VERSION,
+        "notes": notes,
+        "spans": [(c["start"], c["end"]) for c in chunks],
+        "merged": merged,
+        "levels": levels,
+    }
+
+
+# Summarize a transcript in one or more styles
+def summarize_styles(
+    client,
+    tokenizer,
+    transcript_text,
+    segments,
+    styles,
+    cache=None,
+    progress=print_progress,
+    max_workers=MAP_CONCURRENCY,
+    notes=None,
+    on_partial=None,
+    method="Whisper Audio Transcription",
+    share_notes=None,
+):
+    """
+    Returns {"summaries" (style -> text), "chunk_summaries", "chunk_spans",
+    "estimated_tokens", "reduce_levels", "notes"}.
+
+    Short transcripts get one call per style over the whole text, and
+    chunk_summaries, chunk_spans, reduce_levels are empty and notes is None.
+    Long ones are summarized from chunk_notes(); pass the "notes" of an
+    earlier result for the same transcript to skip straight to the
+    per-style calls. chunk_summaries are the per-chunk notes.
+
+    If given, share_notes(make_notes) is called instead of make_notes() to
+    get the notes, and may return notes made by another caller instead.
+    """
+    with metrics.span("tokenize") as counters:
+        estimated_tokens = len(tokenizer.encode(transcript_text))
+        counters["tokens"] = estimated_tokens
+    progress(
+        "info",
+        f"📊 Transcript ready: ~{estimated_tokens} tokens | Method: {method}",
+    )
+    result = {
+        "summaries": {},
+        "chunk_summaries": [],
+        "chunk_spans": [],
+        "estimated_tokens": estimated_tokens,
+        "reduce_levels": [],
+        "notes": None,
+    }
+
+    # Short transcripts fit in a single prompt
+    if estimated_tokens + SUMMARY_MAX_TOKENS <= MODEL_CONTEXT_TOKENS:
+        progress("write", f"🧠 Generating {_style_count(styles)}...")
+        prompts = [
+            SUMMARY_PROMPT_TEMPLATES[style].replace("{transcript}", transcript_text)
+            for style in styles
+        ]
+    else:
+        made = []
+        if notes is None or notes.get("version") != NOTES_VERSION:
+
+            def make_notes():
+                made.append(True)
+                return chunk_notes(
+                    client,
+                    tokenizer,
+                    transcript_text,
+                    segments,
+                    cache=cache,
+                    progress=progress,
+                    max_workers=max_workers,
+                    on_partial=on_partial,
+                )
+
+            notes = make_notes() if share_notes is None else share_notes(make_notes)
+        if not made:
+            progress("info", "♻️ Reusing chunk notes from an earlier summary.")
+            if on_partial is not None:
+                for i, chunk in enumerate(notes["notes"]):
+                    on_partial("chunk", i, chunk)
+        result["notes"] = notes
+        result["chunk_summaries"] = notes["notes"]
+        result["chunk_spans"] = [tuple(span) for span in notes["spans"]]
+        result["reduce_levels"] = notes["levels"]
+
+        progress("write", f"🔄 Writing {_style_count(styles)} from the notes...")
+        combined = "\n\n".join(notes["merged"])
+        prompts = [
+            NOTES_PROMPT_TEMPLATES[style].replace("{combined}", combined)
+            for style in styles
+        ]
+
+    def write_summary(i):
+        on_delta = None
+        if on_partial is not None:
+            on_delta = lambda text: on_partial("summary", styles[i], text)
+        return chat_complete(client, prompts[i], cache=cache, on_delta=on_delta)
+
+    summaries = map_concurrent(
+        write_summary, range(len(styles)), max_workers=max_workers
+    )
+    result["summaries"] = dict(zip(styles, summaries))
+    return result
+
+
+def _style_count(styles):
+    return "summary" if len(styles) == 1 else f"{len(styles)} summaries"
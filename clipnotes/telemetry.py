@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Usage logging.
+
+log_usage() only puts the event on an in-memory queue; a background thread
+posts queued events to the webhook in batches, with a timeout, so a slow or
+unreachable sink never holds up a request. Batches that can't be delivered
+are appended to a spool file on disk and retried with the next successful
+flush. When the queue or the spool is full, events are dropped and counted.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from clipnotes.resources import get_usage_reporter
+
+DEFAULT_WEBHOOK_URL = "https://webhook.site/42e8bf51-3e8b-4549-b251-21ceb38d2c7a"
+
+# Set CLIPNOTES_TELEMETRY_URL to an empty string to turn usage logging off
+WEBHOOK_URL = os.getenv("CLIPNOTES_TELEMETRY_URL", DEFAULT_WEBHOOK_URL)
+
+
+class UsageReporter:
+    """
+    Batches usage events and posts them from a background thread
+    """
+
+    def __init__(
+        self,
+        url,
+        timeout=5.0,
+        batch_size=50,
+        flush_interval=5.0,
+        max_buffer=1000,
+        spool_path=None,
+        max_spool_bytes=5 * 1024 * 1024,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.max_spool_bytes = max_spool_bytes
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._send_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._counts = {
+            "queued": 0,
+            "sent": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "spooled": 0,
+            "dropped_buffer_full": 0,
+            "dropped_spool_full": 0,
+        }
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._counts[key] += n
+
+    # Queue an event without blocking; drops it if the buffer is full
+    def log(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count("dropped_buffer_full")
+            return False
+        self._count("queued")
+        self._ensure_worker()
+        return True
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name="clipnotes-telemetry", daemon=True
+                )
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            try:
+                self._work_once()
+            except Exception as e:
+                # One bad batch must not end the only thread that sends events
+                print(f"Usage logging worker error: {e}")
+
+    def _work_once(self):
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            # Idle: a good moment to retry anything left in the spool
+            with self._send_lock:
+                self._send_spool()
+            return
+        # Holding the lock makes flush() wait for this batch too
+        with self._send_lock:
+            # Give a burst of events a moment to arrive before sending
+            time.sleep(min(0.5, self.flush_interval))
+            self._deliver([first] + self._take(self.batch_size - 1))
+
+    def _take(self, limit):
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _post(self, events):
+        try:
+            response = requests.post(self.url, json=events, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Usage logging failed: {e}")
+            self._count("failed_batches")
+            return False
+        self._count("batches")
+        self._count("sent", len(events))
+        return True
+
+    def _deliver(self, events):
+        if self._post(events):
+            self._send_spool()
+        else:
+            self._spool(events)
+
+    def _spool(self, events):
+        if not self.spool_path:
+            self._count("dropped_spool_full", len(events))
+            return
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        try:
+            size = os.path.getsize(self.spool_path)
+        except OSError:
+            size = 0
+        if size + len(lines.encode()) > self.max_spool_bytes:
+            self._count("dropped_spool_full", len(events))
+            return
+        try:
+            os.makedirs(
+                os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True
+            )
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self._count("spooled", len(events))
+        except OSError as e:
+            print(f"Usage spool write failed: {e}")
+            self._count("dropped_spool_full", len(events))
+
+    # Resend spooled events; the spool is only cleared once they are delivered
+    def _send_spool(self):
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            print(f"Usage spool read failed: {e}")
+            return
+        if not events:
+            return
+        for i in range(0, len(events), self.batch_size):
+            if not self._post(events[i : i + self.batch_size]):
+                remaining = events[i:]
+                try:
+                    with open(self.spool_path, "w", encoding="utf-8") as f:
+                        f.writelines(json.dumps(event) + "\n" for event in remaining)
+                except OSError as e:
+                    print(f"Usage spool write failed: {e}")
+                return
+        try:
+            os.remove(self.spool_path)
+        except OSError as e:
+            print(f"Usage spool cleanup failed: {e}")
+            try:
+                # Emptied at least, so the events aren't sent again
+                open(self.spool_path, "w").close()
+            except OSError:
+                pass
+
+    # Send everything queued so far; used at exit so short runs don't lose events
+    def flush(self):
+        with self._send_lock:
+            while True:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    break
+                self._deliver(batch)
+
+    def stats(self):
+        with self._stats_lock:
+            counts = dict(self._counts)
+        counts["buffered"] = self._queue.qsize()
+        return counts
+
+
+# Logging function
+def log_usage(video_url, summary_type, status="success", method=""):
+    if not WEBHOOK_URL:
+        return
+    get_usage_reporter().log(
+        {
+            "timestamp": datetime.utcnow().isoformat(),
+            "video_url": video_url,
+            "summary_type": summary_type,
+            "status": status,
+            "method": method,
+        }
+    )
+
+
+# Flush queued usage events now (e.g. before a worker process exits)
+def flush_usage():
+    if WEBHOOK_URL:
+        get_usage_reporter().flush()
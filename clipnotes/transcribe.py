@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Whisper transcription, optionally split into pieces that are transcribed
+concurrently and stitched back together with global timestamps.
+"""
+
+import csv
+import os
+import shutil
+import subprocess
+import tempfile
+
+from clipnotes import metrics
+from clipnotes.llm import call_with_backoff, map_concurrent
+from clipnotes.media import ffmpeg_binary
+from clipnotes.resources import get_rate_limiter
+from clipnotes.segments import normalize_segments
+
+
+# Cut audio into fixed-length pieces without re-encoding
+def split_audio(input_file, workdir, piece_seconds=600):
+    """
+    Returns a list of (piece_path, start_seconds) in playback order.
+
+    Pieces are cut with ffmpeg's segment muxer; the start offsets come from
+    its segment list, so they are exact even when cuts land on frame
+    boundaries rather than on multiples of piece_seconds.
+    """
+    ext = os.path.splitext(input_file)[1] or ".mp3"
+    list_file = os.path.join(workdir, "pieces.csv")
+    command = [
+        ffmpeg_binary(),
+        "-y",
+        "-i",
+        input_file,
+        "-f",
+        "segment",
+        "-segment_time",
+        str(piece_seconds),
+        "-segment_list",
+        list_file,
+        "-segment_list_type",
+        "csv",
+        "-reset_timestamps",
+        "1",
+        "-c",
+        "copy",
+        os.path.join(workdir, f"piece_%04d{ext}"),
+    ]
+    with metrics.span("split_audio"):
+        result = subprocess.run(
+            command, check=False, capture_output=True, text=True, timeout=300
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg split failed: {result.stderr[-300:]}")
+
+    pieces = []
+    with open(list_file, newline="") as f:
+        for row in csv.reader(f):
+            if row:
+                pieces.append((os.path.join(workdir, row[0]), float(row[1])))
+    return pieces
+
+
+# Transcribe one file and return normalized segments
+def transcribe_file(client, path, model="whisper-1", limiter=None):
+    if limiter is None:
+        limiter = get_rate_limiter("whisper")
+
+    def request():
+        with open(path, "rb") as f:
+            return client.audio.transcriptions.create(
+                model=model, file=f, response_format="verbose_json"
+            )
+
+    with metrics.span("transcription", model=model) as counters:
+        counters["upload_bytes"] = os.path.getsize(path)
+        transcript = call_with_backoff(request, limiter=limiter)
+        segments = normalize_segments(transcript.segments or [])
+        counters["audio_seconds"] = segments[-1]["end"] if segments else 0.0
+    return segments
+
+
+# Shift piece-local segments to positions in the full recording
+def stitch_segments(piece_segments, offsets):
+    stitched = []
+    for segments, offset in zip(piece_segments, offsets):
+        for seg in segments:
+            stitched.append(
+                {
+                    "start": seg["start"] + offset,
+                    "end": seg["end"] + offset,
+                    "text": seg["text"],
+                }
+            )
+    return stitched
+
+
+# Split-and-stitch transcription
+def transcribe_parallel(
+    client, input_file, piece_seconds=600, max_workers=4, on_done=None
+):
+    """
+    Transcribe input_file with Whisper, piece_seconds at a time and up to
+    max_workers pieces in flight. Returns segments ({start, end, text}) with
+    timestamps relative to the start of input_file.
+
+    Falls back to a single upload if the audio cannot be split.
+    """
+    workdir = tempfile.mkdtemp(prefix="clipnotes_pieces_")
+    try:
+        try:
+            pieces = split_audio(input_file, workdir, piece_seconds)
+        except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"Audio split failed, transcribing in one piece: {e}")
+            pieces = [(input_file, 0.0)]
+        if not pieces:
+            pieces = [(input_file, 0.0)]
+
+        piece_segments = map_concurrent(
+            lambda piece: transcribe_file(client, piece[0]),
+            pieces,
+            max_workers=max_workers,
+            on_done=(
+                (lambda i, _: on_done(i, len(pieces))) if on_done is not None else None
+            ),
+        )
+        return stitch_segments(piece_segments, [offset for _, offset in pieces])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Dead-air removal and speed-up before Whisper.
+
+ffmpeg's silencedetect finds the pauses in the compressed audio; everything
+but SILENCE_PAD seconds at each edge of a pause is cut, and the rest is
+optionally sped up with atempo. Cuts are made on whole 10 ms frames (frame
+numbers, not timestamps), so the length of every kept stretch is known
+exactly and a TimeMap can move Whisper's timestamps back to positions in
+the original video.
+"""
+
+import math
+import os
+import re
+import subprocess
+import tempfile
+from bisect import bisect_right
+
+from clipnotes import metrics
+from clipnotes.media import ffmpeg_binary, print_progress
+
+# Quieter than this for at least SILENCE_SECONDS counts as a pause
+SILENCE_DB = float(os.getenv("CLIPNOTES_SILENCE_DB", "-35"))
+SILENCE_SECONDS = float(os.getenv("CLIPNOTES_SILENCE_SECONDS", "1.0"))
+
+# Audio kept at each edge of a pause, so word onsets and endings survive
+SILENCE_PAD = 0.25
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 160  # 10 ms
+FRAME_SECONDS = FRAME_SAMPLES / SAMPLE_RATE
+
+# Not worth re-encoding for less than this share of the audio
+MIN_SAVING = 0.05
+
+SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+DURATION = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+
+class TimeMap:
+    """
+    Maps times in trimmed (and sped-up) audio back to the original.
+
+    pieces are (original_start, original_end) of each kept stretch, in
+    order; original_end may be math.inf for a stretch running to the end.
+    """
+
+    def __init__(self, pieces, tempo=1.0):
+        self.pieces = pieces
+        self.tempo = tempo
+        self.trimmed_starts = []
+        position = 0.0
+        for start, end in pieces:
+            self.trimmed_starts.append(position)
+            position += (end - start) / tempo
+
+    def to_original(self, seconds):
+        i = max(0, bisect_right(self.trimmed_starts, seconds) - 1)
+        start, end = self.pieces[i]
+        return min(start + (seconds - self.trimmed_starts[i]) * self.tempo, end)
+
+    def remap_segments(self, segments):
+        return [
+            {
+                **seg,
+                "start": self.to_original(seg["start"]),
+                "end": self.to_original(seg["end"]),
+            }
+            for seg in segments
+        ]
+
+
+# Pauses in input_file as (start, end) seconds, and its duration if known
+def detect_silences(input_file, noise_db=SILENCE_DB, min_seconds=SILENCE_SECONDS):
+    command = [
+        ffmpeg_binary(),
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        input_file,
+        "-af",
+        f"silencedetect=noise={noise_db}dB:d={min_seconds}",
+        "-f",
+        "null",
+        "-",
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg silencedetect failed: {result.stderr[-300:]}")
+
+    duration = None
+    match = DURATION.search(result.stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None:
+        # Silent to the very end
+        silences.append((start, duration if duration is not None else math.inf))
+    return silences, duration
+
+
+# Frame ranges [first, last) to keep; last is None for "to the end"
+def keep_frames(silences, pad=SILENCE_PAD):
+    keep = []
+    first = 0
+    for start, end in silences:
+        cut_from = math.ceil((start + pad) / FRAME_SECONDS)
+        cut_to = None if math.isinf(end) else math.floor((end - pad) / FRAME_SECONDS)
+        if cut_to is not None and cut_to <= cut_from:
+            continue
+        if cut_from > first:
+            keep.append((first, cut_from))
+        if cut_to is None:
+            return keep
+        first = cut_to
+    keep.append((first, None))
+    return keep
+
+
+# Cut pauses out of input_file (and speed it up) into output_file
+def trim_audio(
+    input_file, output_file, cut_pauses=True, tempo=1.0, progress=print_progress
+):
+    """
+    Returns the TimeMap for output_file, or None when trimming was skipped
+    or failed, in which case input_file should be used as it is.
+    """
+    tempo = min(max(tempo, 0.5), 2.0)
+    try:
+        with metrics.span("trim") as counters:
+            silences, duration = (
+                detect_silences(input_file) if cut_pauses else ([], None)
+            )
+            frames = keep_frames(silences)
+            pieces = [
+                (
+                    first * FRAME_SECONDS,
+                    math.inf if last is None else last * FRAME_SECONDS,
+                )
+                for first, last in frames
+            ]
+            removed = pieces[0][0] if pieces else 0.0
+            removed += sum(b[0] - a[1] for a, b in zip(pieces, pieces[1:]))
+            if pieces and duration is not None and pieces[-1][1] < duration:
+                removed += duration - pieces[-1][1]
+            counters["removed_seconds"] = removed
+            if not frames or (
+                tempo == 1.0 and removed < MIN_SAVING * (duration or math.inf)
+            ):
+                # Nothing (worth) cutting
+                return None
+
+            # One frame number test per kept stretch, in a filter script file
+            # because long recordings have hundreds of them
+            select = "+".join(
+                f"gte(n,{first})" if last is None else f"between(n,{first},{last - 1})"
+                for first, last in frames
+            )
+            filters = [
+                f"aresample={SAMPLE_RATE}",
+                "aformat=channel_layouts=mono",
+                f"asetnsamples=n={FRAME_SAMPLES}:p=0",
+                f"aselect='{select}'",
+                "asetpts=N/SR/TB",
+            ]
+            if tempo != 1.0:
+                filters.append(f"atempo={tempo}")
+            with tempfile.NamedTemporaryFile(
+                "w", suffix=".txt", delete=False
+            ) as script:
+                script.write(",".join(filters))
+            try:
+                result = subprocess.run(
+                    [
+                        ffmpeg_binary(),
+                        "-y",
+                        "-i",
+                        input_file,
+                        "-filter_script:a",
+                        script.name,
+                        "-ac",
+                        "1",
+                        "-ab",
+                        "32k",
+                        # lame's fastest mode; this copy only goes to Whisper
+                        "-compression_level",
+                        "9",
+                        "-f",
+                        "mp3",
+                        output_file,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    timeout=300,
+                )
+            finally:
+                os.remove(script.name)
+            if result.returncode != 0:
+                raise RuntimeError(f"ffmpeg trim failed: {result.stderr[-300:]}")
+            counters["output_bytes"] = os.path.getsize(output_file)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        progress("warning", f"⚠️ Silence trimming failed, using the full audio: {e}")
+        return None
+
+    kept = f"cut {removed / 60:.1f} min of pauses" if removed else "no pauses cut"
+    sped = f", sped up {tempo:g}x" if tempo != 1.0 else ""
+    progress("write", f"✂️ Audio trimmed: {kept}{sped}")
+    return TimeMap(pieces, tempo)
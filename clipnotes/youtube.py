@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+YouTube URL helpers.
+"""
+
+import re
+from urllib.parse import parse_qs, urlparse
+
+VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_DOMAINS = ("youtube.com", "youtube-nocookie.com")
+PATH_PREFIXES = ("/shorts/", "/embed/", "/live/", "/v/", "/e/")
+
+
+# Canonical video ID for a YouTube URL, or None if it isn't one
+def canonical_video_id(url):
+    """
+    youtu.be/X, watch?v=X&t=30, /shorts/X and /embed/X all map to X
+    """
+    url = (url or "").strip()
+    if VIDEO_ID.match(url):
+        return url
+    if "://" not in url:
+        url = "https://" + url
+
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    candidate = None
+    if host == "youtu.be":
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif any(host == d or host.endswith("." + d) for d in YOUTUBE_DOMAINS):
+        if parsed.path == "/watch":
+            candidate = parse_qs(parsed.query).get("v", [None])[0]
+        else:
+            for prefix in PATH_PREFIXES:
+                if parsed.path.startswith(prefix):
+                    candidate = parsed.path[len(prefix) :].split("/")[0]
+                    break
+
+    if candidate and VIDEO_ID.match(candidate):
+        return candidate
+    return None
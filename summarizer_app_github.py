@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
-import subprocess
-import uuid
-from openai import OpenAI
 import os
 import math
+import html
 from dotenv import load_dotenv
-import requests
-from datetime import datetime
-from transformers import GPT2TokenizerFast
-from pathlib import Path
-import hashlib
-import tempfile
-import shutil
+from clipnotes.jobs import JobQueueFull
+from clipnotes.metrics import METRICS
+from clipnotes.resources import get_job_manager, get_metrics_server, get_response_cache
+from clipnotes.pipeline import transcript_search_index
+from clipnotes.summarize import ALL_STYLES
+from clipnotes.segments import (
+    format_timestamp,
+    parse_timestamp,
+    sentence_at,
+    sentence_times,
+    sentence_window,
+)
 
 # Try to load API key from Streamlit secrets
 try:
@@ -22,224 +25,17 @@ except Exception:
     load_dotenv()
     api_key = os.getenv("OPENAI_API_KEY")
 
-# Initialize OpenAI client
-client = OpenAI(api_key=api_key)
-
-# Initialize tokenizer
-tokenizer = GPT2TokenizerFast.from_pretrained("gpt2")
-
-
-# Hash function for caching
-def url_hash(url):
-    return hashlib.md5(url.encode()).hexdigest()
-
+# Background job runner (and its OpenAI client), built once per process
+job_manager = get_job_manager(api_key)
 
-# More aggressive audio download function
-def download_audio_aggressive(url, output_filename):
-    """
-    Download audio with the most effective anti-blocking strategies
-    """
-    commands_to_try = [
-        # Strategy 1: Use cookies file simulation and newest user agent
-        [
-            "yt-dlp",
-            "-x",
-            "--audio-format",
-            "mp3",
-            "--user-agent",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            "--add-header",
-            "Accept-Language:en-US,en;q=0.9",
-            "--add-header",
-            "Accept:text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "--sleep-interval",
-            "1",
-            "--max-sleep-interval",
-            "3",
-            "--output",
-            output_filename,
-            url,
-        ],
-        # Strategy 2: Simulate mobile browser
-        [
-            "yt-dlp",
-            "-x",
-            "--audio-format",
-            "mp3",
-            "--user-agent",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1",
-            "--add-header",
-            "Accept-Language:en-US,en;q=0.9",
-            "--sleep-interval",
-            "2",
-            "--output",
-            output_filename,
-            url,
-        ],
-        # Strategy 3: Use very basic approach with delay
-        [
-            "yt-dlp",
-            "-x",
-            "--audio-format",
-            "mp3",
-            "--sleep-interval",
-            "3",
-            "--max-sleep-interval",
-            "5",
-            "--retries",
-            "3",
-            "--output",
-            output_filename,
-            url,
-        ],
-        # Strategy 4: Try with format selection
-        [
-            "yt-dlp",
-            "-f",
-            "bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio",
-            "-x",
-            "--audio-format",
-            "mp3",
-            "--output",
-            output_filename,
-            url,
-        ],
-        # Strategy 5: Force IPv4 with delays
-        [
-            "yt-dlp",
-            "-x",
-            "--audio-format",
-            "mp3",
-            "--force-ipv4",
-            "--sleep-interval",
-            "2",
-            "--socket-timeout",
-            "30",
-            "--output",
-            output_filename,
-            url,
-        ],
-    ]
-
-    for i, command in enumerate(commands_to_try):
-        try:
-            st.write(f"🔄 Trying download strategy {i+1}/{len(commands_to_try)}...")
-
-            # Run with timeout and capture output
-            result = subprocess.run(
-                command,
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=240,  # 4 minute timeout per attempt
-            )
-
-            if result.returncode == 0:
-                st.success(f"✅ Audio downloaded successfully using strategy {i+1}")
-                return True
-            else:
-                st.warning(f"❌ Strategy {i+1} failed (code {result.returncode})")
-                if result.stderr:
-                    error_preview = (
-                        result.stderr[:150] + "..."
-                        if len(result.stderr) > 150
-                        else result.stderr
-                    )
-                    st.text(f"Error: {error_preview}")
-
-        except subprocess.TimeoutExpired:
-            st.warning(f"⏱️ Strategy {i+1} timed out after 4 minutes")
-        except Exception as e:
-            st.warning(f"❌ Strategy {i+1} exception: {str(e)}")
-
-    return False
-
-
-# Improved compression function
-def compress_audio(input_file, output_file):
-    """
-    Compress audio file for transcription with error handling
-    """
-    ffmpeg_commands = [
-        # Primary command with aggressive compression
-        [
-            "ffmpeg",
-            "-y",
-            "-i",
-            input_file,
-            "-ar",
-            "16000",
-            "-ac",
-            "1",
-            "-ab",
-            "32k",  # Low bitrate
-            "-f",
-            "mp3",
-            output_file,
-        ],
-        # Fallback command
-        ["ffmpeg", "-y", "-i", input_file, "-ar", "16000", "-ac", "1", output_file],
-    ]
-
-    for i, command in enumerate(ffmpeg_commands):
-        try:
-            st.write(f"🔄 Compressing audio (method {i+1})...")
-            result = subprocess.run(
-                command, check=False, capture_output=True, text=True, timeout=90
-            )
-
-            if result.returncode == 0:
-                st.success(f"✅ Audio compressed successfully")
-                return True
-            else:
-                st.warning(f"Compression method {i+1} failed")
+# Optional /metrics endpoint (CLIPNOTES_METRICS_PORT) and stage timing panel
+get_metrics_server()
+show_debug = os.getenv("CLIPNOTES_DEBUG") == "1" or "debug" in st.query_params
 
-        except subprocess.TimeoutExpired:
-            st.error("Audio compression timed out")
-        except FileNotFoundError:
-            st.error("❌ ffmpeg not found. This tool requires ffmpeg to be installed.")
-            return False
-        except Exception as e:
-            st.warning(f"Compression method {i+1} failed: {str(e)}")
 
-    return False
-
-
-# Logging function
-def log_usage(video_url, summary_type, status="success", method=""):
-    try:
-        requests.post(
-            "https://webhook.site/42e8bf51-3e8b-4549-b251-21ceb38d2c7a",
-            json={
-                "timestamp": datetime.utcnow().isoformat(),
-                "video_url": video_url,
-                "summary_type": summary_type,
-                "status": status,
-                "method": method,
-            },
-        )
-    except Exception as e:
-        print(f"Usage logging failed: {e}")
-
-
-# Chunking function
-def chunk_transcript(text, max_tokens=3000):
-    words = text.split()
-    chunks = []
-    current_chunk = []
-
-    for word in words:
-        current_chunk.append(word)
-        token_count = len(tokenizer.encode(" ".join(current_chunk)))
-
-        if token_count >= max_tokens:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = []
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-
-    return chunks
+# Route pipeline progress messages to the matching Streamlit call
+def st_progress(kind, message):
+    getattr(st, kind)(message)
 
 
 # Title and instructions
@@ -305,6 +101,7 @@ with st.form(key="input_form"):
         "quotes": "Quotes — 5–10 compelling lines",
         "insights": "Insights — strategic takeaways with explanations",
         "newbie": "Newbie — explain main points like I'm new to the topic",
+        ALL_STYLES: "All styles — every format above from one pass",
     }
     label_to_key = {v: k for k, v in summary_labels.items()}
     selected_label = st.selectbox(
@@ -316,29 +113,96 @@ with st.form(key="input_form"):
 
 if submit_button and url:
     st.session_state["show_summary"] = False
-    uid = url_hash(url)
-
-    if (
-        st.session_state.get("transcript_url") == uid
-        and "transcript_text" in st.session_state
-        and "transcript_segments" in st.session_state
-    ):
-        st.info("📋 Transcript already cached — skipping download and transcription.")
-        transcript_text = st.session_state["transcript_text"]
-        segments = st.session_state["transcript_segments"]
-    else:
-        st.success(f"📥 Processing URL: {url}")
-
-        st.info(
-            "🔄 **Starting download process...** This may take a few minutes due to YouTube's anti-bot measures. The tool will try multiple strategies automatically."
-        )
+    st.session_state.pop("job_outcome", None)
+    try:
+        st.session_state["job_id"] = job_manager.submit(url, selected_type)
+    except JobQueueFull as e:
+        st.warning(f"🚦 {e}")
+
+
+# Summaries as they stream in and chunk notes as each chunk finishes
+def show_partial_results(partial):
+    summaries = partial["summary"]
+    if summaries:
+        st.subheader("🧠 Overall Summary")
+        for style, text in summaries.items():
+            if len(summaries) > 1:
+                st.markdown(f"**{summary_labels[style].split(' — ')[0]}**")
+            st.markdown(text, unsafe_allow_html=True)
+    if partial["chunk"]:
+        st.subheader("🧩 Chunk Notes")
+        for i, chunk in sorted(partial["chunk"].items()):
+            with st.expander(f"View Part {i+1} Notes"):
+                st.markdown(chunk, unsafe_allow_html=True)
 
-        # Use more unique filename
-        audio_filename = f"downloaded_{uid}.%(ext)s"
 
-        # Try to download audio with aggressive strategies
-        if not download_audio_aggressive(url, audio_filename):
-            st.error("❌ **All download strategies failed.**")
+# Poll the background job; the whole page reruns once it finishes
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        st.session_state.pop("job_id", None)
+        st.rerun()
+
+    for kind, message in job["messages"]:
+        st_progress(kind, message)
+
+    if job["status"] == "queued":
+        st.info("⏳ Waiting for a free worker...")
+    if job["status"] in ("queued", "running"):
+        show_partial_results(job["partial"])
+        if job["subscribers"] > 1:
+            st.caption(f"👥 Shared with {job['subscribers'] - 1} other request(s)")
+        if st.button("Cancel", key=f"cancel_{job_id}"):
+            job_manager.cancel(job_id)
+            st.session_state.pop("job_id", None)
+            st.session_state["job_outcome"] = {"status": "cancelled", "messages": []}
+            st.rerun()
+        return
+
+    st.session_state.pop("job_id", None)
+    st.session_state["job_outcome"] = job
+    if job["status"] == "done":
+        result = job["result"]
+        st.session_state["transcript_text"] = result["transcript"]["text"]
+        st.session_state["transcript_segments"] = result["transcript"]["segments"]
+        st.session_state["transcript_sentences"] = result["transcript"][
+            "sentence_starts"
+        ]
+        st.session_state["transcript_sentence_times"] = sentence_times(
+            result["transcript"]["segments"], result["transcript"]["sentence_starts"]
+        )
+        st.session_state.pop("transcript_page", None)
+        st.session_state["transcript_url"] = result["transcript"]["video_id"]
+        st.session_state["summaries"] = result.get("summaries") or {
+            job["style"]: result["summary"]
+        }
+        if result["chunk_summaries"]:
+            st.session_state["chunk_summaries"] = result["chunk_summaries"]
+            st.session_state["chunk_spans"] = result["chunk_spans"]
+            st.session_state["reduce_levels"] = result["reduce_levels"]
+        else:
+            st.session_state.pop("chunk_summaries", None)
+            st.session_state.pop("chunk_spans", None)
+        st.session_state["show_summary"] = True
+    st.rerun()
+
+
+if "job_id" in st.session_state:
+    show_job_progress(st.session_state["job_id"])
+
+outcome = st.session_state.get("job_outcome")
+if outcome is not None:
+    if outcome["messages"]:
+        with st.expander("Processing log"):
+            for kind, message in outcome["messages"]:
+                st_progress(kind, message)
+    if outcome["status"] == "cancelled":
+        st.info("🛑 Cancelled.")
+    elif outcome["status"] == "failed":
+        error = outcome["error"]
+        st.error(str(error))
+        if getattr(error, "status", None) == "all_download_methods_failed":
             st.markdown(
                 """
             **This could be due to:**
@@ -355,189 +219,135 @@ if submit_button and url:
             - Check if the video URL is correct and publicly accessible
             """
             )
-            log_usage(url, selected_type, status="all_download_methods_failed")
-            st.stop()
 
-        # Find the actual downloaded file
-        downloaded_files = [
-            f for f in os.listdir(".") if f.startswith(f"downloaded_{uid}")
-        ]
-        if not downloaded_files:
-            # Broader search
-            downloaded_files = [
-                f
-                for f in os.listdir(".")
-                if "downloaded_" in f and f.endswith((".mp3", ".m4a", ".webm", ".mp4"))
-            ]
-
-        if not downloaded_files:
-            st.error("❌ Could not find downloaded audio file")
-            st.stop()
-
-        actual_audio_file = downloaded_files[0]
-        st.success(f"✅ Audio file ready: {actual_audio_file}")
-
-        # Compress audio for transcription
-        compressed_filename = f"compressed_{uid}.mp3"
-
-        if not compress_audio(actual_audio_file, compressed_filename):
-            st.warning("⚠️ Compression failed, using original file...")
-            compressed_filename = actual_audio_file
-
-        # Transcription with Whisper
-        st.write("🎤 Transcribing audio with OpenAI Whisper...")
-        try:
-            with open(compressed_filename, "rb") as f:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1", file=f, response_format="verbose_json"
-                )
+# Sentences per page of the transcript viewer
+TRANSCRIPT_PAGE_SENTENCES = 40
 
-            transcript_text = " ".join([seg.text for seg in transcript.segments])
-            segments = transcript.segments
-
-            # Cache the results
-            st.session_state["transcript_text"] = transcript_text
-            st.session_state["transcript_segments"] = segments
-            st.session_state["transcript_url"] = uid
-
-            st.success("✅ Transcription completed successfully!")
-            log_usage(url, selected_type, status="success", method="whisper")
-
-            # Clean up temporary files
-            try:
-                if os.path.exists(actual_audio_file):
-                    os.remove(actual_audio_file)
-                if (
-                    os.path.exists(compressed_filename)
-                    and compressed_filename != actual_audio_file
-                ):
-                    os.remove(compressed_filename)
-                st.info("🧹 Temporary files cleaned up")
-            except Exception as e:
-                print(f"Cleanup error: {e}")
-
-        except Exception as e:
-            st.error(f"❌ Transcription failed: {e}")
-            log_usage(url, selected_type, status="transcription_failed")
-
-            # Clean up files on error
-            try:
-                if os.path.exists(actual_audio_file):
-                    os.remove(actual_audio_file)
-                if (
-                    os.path.exists(compressed_filename)
-                    and compressed_filename != actual_audio_file
-                ):
-                    os.remove(compressed_filename)
-            except:
-                pass
-            st.stop()
-
-    # Show transcript info
-    estimated_tokens = len(tokenizer.encode(transcript_text))
-    st.info(
-        f"📊 Transcript ready: ~{estimated_tokens} tokens | Method: Whisper Audio Transcription"
-    )
+# Search hits listed at most
+SEARCH_RESULTS = 50
 
-    # Prepare summary prompts
-    summary_prompt_templates = {
-        "basic": "Summarize the following transcript in 5–7 clear sentences.\n\n{transcript}",
-        "bullets": "Summarize the transcript in 5–10 key bullet points.\n\n{transcript}",
-        "quotes": "Extract 5–10 powerful quotes that capture the speaker's ideas. Do not include timestamps.\n\n{transcript}",
-        "insights": "List 5–7 strategic takeaways with explanations.\n\n{transcript}",
-        "newbie": "Explain 5–7 key ideas in simple terms.\n\n{transcript}",
-    }
 
-    chunked = False
-    chunk_summaries = []
-    max_tokens = 8192
+# Open the transcript viewer on the page with the sentence at `seconds`
+def show_transcript_at(seconds):
+    sentence = sentence_at(st.session_state["transcript_sentence_times"], seconds)
+    st.session_state["transcript_page"] = sentence // TRANSCRIPT_PAGE_SENTENCES + 1
+    st.session_state["show_transcript"] = True
+
+
+# Jump to the time typed into the viewer
+def jump_to_time():
+    seconds = parse_timestamp(st.session_state["transcript_jump"])
+    if seconds is not None:
+        show_transcript_at(seconds)
 
-    # Handle long transcripts with chunking
-    if estimated_tokens + 900 > max_tokens:
-        st.warning(
-            "📝 Transcript is long — using intelligent chunking for better results."
-        )
-        chunks = chunk_transcript(transcript_text)
-        for i, chunk in enumerate(chunks):
-            st.write(f"🧠 Analyzing chunk {i+1} of {len(chunks)}...")
-            prompt = summary_prompt_templates[selected_type].replace(
-                "{transcript}", chunk
-            )
-            res = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=900,
-            )
-            chunk_summaries.append(res.choices[0].message.content.strip())
-        st.session_state["chunk_summaries"] = chunk_summaries
-        chunked = True
-
-    # Generate final summary
-    if chunked:
-        st.write("🔄 Synthesizing final summary from all chunks...")
-        condensed_prompt = {
-            "basic": "Summarize the following multi-part summary into a cohesive paragraph:\n\n{combined}",
-            "bullets": "Summarize the following multi-part summaries into a single cohesive bullet-point list (maximum 10 bullets):\n\n{combined}",
-            "quotes": "From the following quotes, select the 5–10 most compelling. Do not add timestamps.\n\n{combined}",
-            "insights": "Merge the following into 5–7 strategic insights:\n\n{combined}",
-            "newbie": "Combine into a simple explanation for someone new to the topic:\n\n{combined}",
-        }
-        full_summary_prompt = condensed_prompt[selected_type].replace(
-            "{combined}", "\n\n".join(chunk_summaries)
-        )
-        res = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": full_summary_prompt}],
-            temperature=0.7,
-            max_tokens=900,
-        )
-        final_summary = res.choices[0].message.content.strip()
-        st.session_state["summary"] = final_summary
-        st.session_state["show_summary"] = True
-    else:
-        st.write("🧠 Generating summary...")
-        prompt = summary_prompt_templates[selected_type].replace(
-            "{transcript}", transcript_text
-        )
-        res = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=900,
-        )
-        st.session_state["summary"] = res.choices[0].message.content.strip()
-        st.session_state["show_summary"] = True
 
 # Display results
 if st.session_state.get("show_summary"):
     st.subheader("🧠 Overall Summary")
-    st.markdown(st.session_state["summary"], unsafe_allow_html=True)
+    summaries = st.session_state["summaries"]
+    if len(summaries) == 1:
+        st.markdown(next(iter(summaries.values())), unsafe_allow_html=True)
+    else:
+        tabs = st.tabs([summary_labels[style].split(" — ")[0] for style in summaries])
+        for tab, summary in zip(tabs, summaries.values()):
+            tab.markdown(summary, unsafe_allow_html=True)
 
     if "chunk_summaries" in st.session_state:
-        st.subheader("🧩 Chunk Summaries")
+        st.subheader("🧩 Chunk Notes")
+        levels = st.session_state.get("reduce_levels", [])
+        if levels:
+            st.caption(
+                f"Merged in {len(levels)} level(s): "
+                + " → ".join(
+                    f"{level['summaries']} notes (~{level['input_tokens']:,} tokens)"
+                    for level in levels
+                )
+            )
+        spans = st.session_state.get("chunk_spans", [])
         for i, chunk in enumerate(st.session_state["chunk_summaries"]):
-            with st.expander(f"View Part {i+1} Summary"):
+            label = f"View Part {i+1} Notes"
+            if i < len(spans) and spans[i][0] is not None:
+                start, end = spans[i]
+                label += f" [{format_timestamp(start)}–{format_timestamp(end)}]"
+            with st.expander(label):
                 st.markdown(chunk, unsafe_allow_html=True)
 
-    if st.button("Show Full Transcript"):
+    cache_stats = get_response_cache().stats()
+    st.caption(
+        f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"· ~{cache_stats['saved_seconds']:.0f}s and "
+        f"{cache_stats['saved_tokens']:,} tokens saved"
+    )
+
+    if show_debug:
+        with st.expander("🔧 Stage timings"):
+            spans = METRICS.trace(st.session_state["job_outcome"].get("id"))
+            if spans:
+                st.dataframe(spans)
+            else:
+                st.caption("No stages recorded for this run.")
+            st.caption("Process totals (Prometheus text)")
+            st.code(METRICS.to_prometheus(), language="text")
+
+    st.subheader("🔍 Search Transcript")
+    query = st.text_input(
+        'Words, "exact phrases" or prefixes like grow*', key="transcript_query"
+    )
+    if query:
+        segments = st.session_state["transcript_segments"]
+        # One index per video for the whole process, not one per session
+        hits = transcript_search_index(
+            st.session_state["transcript_url"], segments
+        ).search(query)
+        if not hits:
+            st.caption("No matches.")
+        else:
+            shown = (
+                f", showing the first {SEARCH_RESULTS}"
+                if len(hits) > SEARCH_RESULTS
+                else ""
+            )
+            st.caption(
+                f"{len(hits)} matching segments{shown} — click a time to read on"
+            )
+            for n in hits[:SEARCH_RESULTS]:
+                start = segments.starts[n]
+                time_col, text_col = st.columns([1, 7])
+                time_col.button(
+                    f"[{format_timestamp(start)}]",
+                    key=f"search_hit_{n}",
+                    on_click=show_transcript_at,
+                    args=(start,),
+                )
+                # Caption text comes from the uploader; never render it as HTML
+                text_col.markdown(html.escape(segments.text_at(n).strip()))
+
+    if st.toggle("Show Full Transcript", key="show_transcript"):
         st.subheader("📜 Full Transcript")
         segments = st.session_state["transcript_segments"]
-        transcript_lines = ""
-        current_text = ""
-        current_start = None
-
-        for i, seg in enumerate(segments):
-            if current_start is None:
-                current_start = int(seg.start)
-            current_text += seg.text.strip() + " "
-            if seg.text.strip().endswith((".", "?", "!")) or i == len(segments) - 1:
-                minutes = current_start // 60
-                seconds = current_start % 60
-                timestamp = f"[{minutes}:{seconds:02d}]"
-                transcript_lines += f"<p><span style='color:#00bcd4'><strong>{timestamp}</strong></span> {current_text.strip()}</p>"
-                current_text = ""
-                current_start = None
+        starts = st.session_state["transcript_sentences"]
+        page_count = max(1, math.ceil(len(starts) / TRANSCRIPT_PAGE_SENTENCES))
+
+        # Only the sentences on the current page are rendered
+        page_col, jump_col = st.columns(2)
+        page = page_col.number_input(
+            f"Page (of {page_count})",
+            min_value=1,
+            max_value=page_count,
+            key="transcript_page",
+        )
+        jump_col.text_input(
+            "Jump to time (m:ss)", key="transcript_jump", on_change=jump_to_time
+        )
+
+        first = (page - 1) * TRANSCRIPT_PAGE_SENTENCES
+        transcript_lines = "".join(
+            f"<p><span style='color:#00bcd4'><strong>[{format_timestamp(start)}]"
+            f"</strong></span> {html.escape(text)}</p>"
+            for start, text in sentence_window(
+                segments, starts, first, first + TRANSCRIPT_PAGE_SENTENCES
+            )
+        )
 
         st.markdown(
             f"""
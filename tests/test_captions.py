@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Caption parsing against the fixtures in benchmarks/captions: a punctuated
+manual WebVTT track, and the same auto-generated track as WebVTT and srv3.
+"""
+
+import os
+
+import pytest
+
+from clipnotes.captions import caption_segments, parse_captions
+
+CAPTIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks",
+    "captions",
+)
+
+AUTO_TEXT = [
+    "welcome back to the show today we're talking about growth",
+    "strategy and how teams use data so what changed in the market",
+    "this year honestly everything",
+]
+
+
+def load(name):
+    with open(os.path.join(CAPTIONS_DIR, name), encoding="utf-8") as f:
+        return caption_segments(parse_captions(f.read(), name.rsplit(".", 1)[1]))
+
+
+def test_manual_vtt():
+    segments = load("manual.en.vtt")
+    assert [seg["text"] for seg in segments] == [
+        "Welcome back to the show.",
+        "Today we're talking about growth strategy & how teams use data.",
+        "So, what changed in the market this year?",
+        "Honestly? Everything changed.",
+        "Cues past the hour use hours, and this one has no identifier.",
+    ]
+    assert (segments[1]["start"], segments[1]["end"]) == (3.2, 7.85)
+    # 01:02:03.500 --> 01:02:06.250
+    assert (segments[-1]["start"], segments[-1]["end"]) == (3723.5, 3726.25)
+
+
+@pytest.mark.parametrize("name", ["auto.en.vtt", "auto.en.srv3"])
+def test_auto_captions(name):
+    segments = load(name)
+    # Rolled-up repeats merged once each, the empty srv3 <p> and [Music] gone
+    assert [seg["text"] for seg in segments] == AUTO_TEXT
+    assert segments[0]["start"] == 0.16
+    assert segments[-1]["start"] == 10.0
+    # The vtt cue ends where the [Music] one starts, the srv3 one runs on
+    assert 12.86 <= segments[-1]["end"] <= 16.0
+    for seg, following in zip(segments, segments[1:]):
+        assert seg["end"] <= following["start"]
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Jobs for the same video sharing its transcription and its chunk notes.
+
+Download, Whisper and GPT-4 are replaced with fakes; the pipeline's error
+handling, the summarize flow and the jobs' single-flight sharing are real.
+"""
+
+import threading
+import time
+
+import pytest
+
+from clipnotes import jobs, pipeline, summarize
+from clipnotes.segments import SegmentTable
+from clipnotes.store import TranscriptStore
+from clipnotes.strategies import StrategyScheduler
+
+URL = "https://youtu.be/ccccccccccc"
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def fake_pipeline(tmp_path, monkeypatch):
+    state = {"transcribing": threading.Event(), "calls": 0, "usage": []}
+
+    def fetch_audio(url, uid, workdir=".", progress=None):
+        path = tmp_path / f"compressed_{uid}.mp3"
+        path.write_bytes(b"audio")
+        return str(path), str(path)
+
+    # The first call transcribes "forever", reporting progress per piece
+    # (which is where a cancelled job's progress callback raises)
+    def transcribe_parallel(client, input_file, on_done=None, **kwargs):
+        state["calls"] += 1
+        if state["calls"] == 1:
+            state["transcribing"].set()
+            for i in range(1000):
+                time.sleep(0.02)
+                on_done(i, 1000)
+        return [{"start": 0.0, "end": 2.0, "text": "Hello there."}]
+
+    store = TranscriptStore(path=str(tmp_path / "transcripts.sqlite3"))
+    scheduler = StrategyScheduler(["a"], stats_path=str(tmp_path / "stats.json"))
+    monkeypatch.setattr(pipeline, "USE_CAPTIONS", False)
+    monkeypatch.setattr(pipeline, "fetch_audio", fetch_audio)
+    monkeypatch.setattr(pipeline, "transcribe_parallel", transcribe_parallel)
+    monkeypatch.setattr(pipeline, "get_transcript_store", lambda: store)
+    monkeypatch.setattr(pipeline, "get_download_scheduler", lambda: scheduler)
+    monkeypatch.setattr(
+        pipeline,
+        "log_usage",
+        lambda url, summary_type, status, **kwargs: state["usage"].append(status),
+    )
+    monkeypatch.setattr(
+        jobs,
+        "summarize_video",
+        lambda client, transcript, style, progress, on_partial, **kwargs: {
+            "summary": f"{style}: {transcript['text']}"
+        },
+    )
+    return state
+
+
+def test_cancelled_leader_does_not_fail_waiting_job(fake_pipeline):
+    manager = jobs.JobManager(client=None, max_workers=2)
+    leader = manager.submit(URL, "basic")
+    assert fake_pipeline["transcribing"].wait(10)
+
+    sibling = manager.submit(URL, "bullets")
+    wait_for(
+        lambda: any(
+            "already being fetched" in message
+            for _, message in manager.get(sibling)["messages"]
+        )
+    )
+    manager.cancel(leader)
+
+    wait_for(lambda: manager.get(sibling)["status"] in jobs.FINISHED)
+    assert manager.get(leader)["status"] == jobs.CANCELLED
+    sibling_job = manager.get(sibling)
+    assert sibling_job["status"] == jobs.DONE, sibling_job["error"]
+    assert sibling_job["result"]["summary"] == "bullets: Hello there."
+    assert fake_pipeline["calls"] == 2
+    assert "transcription_failed" not in fake_pipeline["usage"]
+
+
+class WordTokenizer:
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def fake_summarize(tmp_path, monkeypatch):
+    state = {"notes_started": threading.Event(), "notes_passes": 0, "calls": []}
+    segments = SegmentTable.from_segments(
+        [{"start": float(i), "end": i + 1.0, "text": "word " * 100} for i in range(90)]
+    )
+    transcript = {
+        "video_id": "ccccccccccc",
+        "text": segments.text,
+        "segments": segments,
+        "method": "whisper",
+    }
+
+    # Slow enough for a second job to arrive while it runs
+    def chunk_notes(*args, progress=None, **kwargs):
+        state["notes_passes"] += 1
+        state["notes_started"].set()
+        for _ in range(25):
+            time.sleep(0.02)
+            progress("write", "✅ Chunk done")
+        return {
+            "version": summarize.NOTES_VERSION,
+            "notes": ["notes"],
+            "spans": [(0.0, 90.0)],
+            "merged": ["notes"],
+            "levels": [],
+        }
+
+    def chat_complete(client, prompt, cache=None, on_delta=None):
+        state["calls"].append(prompt)
+        return "summary"
+
+    store = TranscriptStore(path=str(tmp_path / "transcripts.sqlite3"))
+    store.put(transcript["video_id"], transcript["text"], segments)
+    monkeypatch.setattr(jobs, "get_transcript", lambda *args, **kwargs: transcript)
+    monkeypatch.setattr(pipeline, "get_transcript_store", lambda: store)
+    monkeypatch.setattr(pipeline, "get_tokenizer", WordTokenizer)
+    monkeypatch.setattr(pipeline, "get_response_cache", lambda: None)
+    monkeypatch.setattr(summarize, "chunk_notes", chunk_notes)
+    monkeypatch.setattr(summarize, "chat_complete", chat_complete)
+    return state
+
+
+def test_styles_share_one_notes_pass(fake_summarize):
+    manager = jobs.JobManager(client=None, max_workers=2)
+    first = manager.submit(URL, "basic")
+    assert fake_summarize["notes_started"].wait(10)
+    second = manager.submit(URL, "bullets")
+
+    wait_for(
+        lambda: all(
+            manager.get(job_id)["status"] in jobs.FINISHED for job_id in (first, second)
+        )
+    )
+    for job_id in (first, second):
+        job = manager.get(job_id)
+        assert job["status"] == jobs.DONE, job["error"]
+    assert any(
+        "already being written" in message
+        for _, message in manager.get(second)["messages"]
+    )
+    assert fake_summarize["notes_passes"] == 1
+    assert len(fake_summarize["calls"]) == 2  # one per style
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Transcript search queries, and the process-wide cache of loaded indexes.
+"""
+
+from clipnotes.search import SearchIndex, SearchIndexCache
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.0, "text": "Welcome back to the market"},
+    {"start": 2.0, "end": 4.0, "text": "growth show, where growing teams"},
+    {"start": 4.0, "end": 6.0, "text": "talk market growth and data."},
+]
+
+
+def test_search():
+    index = SearchIndex.from_dict(SearchIndex.build(SEGMENTS).to_dict())
+    assert index.search("market") == [0, 2]
+    assert index.search("market growth") == [2]
+    # A phrase may run across a segment boundary; it matches where it starts
+    assert index.search('"the market growth"') == [0]
+    assert index.search('"market grow*"') == [0, 2]
+    assert index.search('grow* "and data"') == [2]
+    assert index.search('"growth market"') == []
+    assert index.search("nowhere") == []
+
+
+def test_cache_keeps_one_index_per_video():
+    cache = SearchIndexCache(max_entries=2)
+    loads = []
+
+    def load(video_id):
+        loads.append(video_id)
+        return SearchIndex.build(SEGMENTS)
+
+    first = cache.get("a", lambda: load("a"))
+    assert cache.get("a", lambda: load("a")) is first
+    cache.get("b", lambda: load("b"))
+    cache.get("a", lambda: load("a"))
+    cache.get("c", lambda: load("c"))  # evicts b, the least recently used
+    assert cache.get("a", lambda: load("a")) is first
+    cache.get("b", lambda: load("b"))
+    assert loads == ["a", "b", "c", "b"]
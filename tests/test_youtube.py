@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Video IDs of YouTube URLs, and no ID for hosts that only look like YouTube.
+"""
+
+import pytest
+
+from clipnotes.youtube import canonical_video_id
+
+ID = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        ID,
+        f"https://www.youtube.com/watch?v={ID}",
+        f"https://youtube.com/watch?v={ID}&t=30",
+        f"youtube.com/watch?v={ID}",
+        f"https://m.youtube.com/watch?v={ID}",
+        f"https://music.youtube.com/watch?v={ID}&list=RD",
+        f"https://youtu.be/{ID}?t=30",
+        f"https://www.youtube.com/shorts/{ID}",
+        f"https://www.youtube.com/embed/{ID}?start=5",
+        f"https://www.youtube-nocookie.com/embed/{ID}",
+        f"https://www.youtube.com/live/{ID}",
+    ],
+)
+def test_youtube_urls(url):
+    assert canonical_video_id(url) == ID
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        f"https://notyoutube.com/watch?v={ID}",
+        f"https://evilyoutube.com/watch?v={ID}",
+        f"https://www.evilyoutube.com/shorts/{ID}",
+        f"https://youtube.com.evil.example/watch?v={ID}",
+        f"https://fakeyoutube-nocookie.com/embed/{ID}",
+        f"https://notyoutu.be/{ID}",
+        f"https://www.youtube.com/watch?v={ID[:-1]}",
+        f"https://www.youtube.com/channel/{ID}",
+        "",
+    ],
+)
+def test_not_youtube(url):
+    assert canonical_video_id(url) is None